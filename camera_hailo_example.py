@@ -10,9 +10,15 @@ This script demonstrates:
 
 import cv2
 import numpy as np
-from picamera2 import Picamera2
+from picamera2 import Picamera2, MappedArray
 import time
 import sys
+import queue
+import threading
+from contextlib import ExitStack
+import config as cfg
+from frame_bus import FrameBus
+from motion import count_changed_pixels
 
 try:
     from hailo_platform import Device, VStreams, ConfigureParams, InferVStreams
@@ -23,13 +29,29 @@ except ImportError:
 
 
 class HailoCameraProcessor:
-    def __init__(self, model_path=None, camera_resolution=(640, 480)):
+    def __init__(self, model_path=None, camera_resolution=(640, 480),
+                 batch_size=8, max_batch_wait_ms=100, low_latency=False,
+                 frame_bus_name=None, process_every_n_frames=1,
+                 motion_threshold=None, scan_interval_no_motion=None,
+                 color_preview=False):
         """
         Initialize Hailo camera processor
         
         Args:
             model_path: Path to Hailo model file (.hef)
             camera_resolution: Tuple of (width, height) for camera capture
+            batch_size: Number of frames submitted to Hailo per inference call
+            max_batch_wait_ms: Submit a partial batch after waiting this long
+            low_latency: Use single-slot pipeline queues to minimize latency
+            frame_bus_name: If set, publish captured frames to a shared memory
+                FrameBus of this name so other processes can read them
+            process_every_n_frames: Run inference on every Nth frame while there is motion
+            motion_threshold: Changed pixels (at full resolution) that count as motion,
+                None disables the motion gate
+            scan_interval_no_motion: Run inference on every Nth frame while the
+                scene is still, None skips inference entirely when still
+            color_preview: Display frames in color, converted from the YUV420
+                buffer, instead of the grayscale Y plane
         """
         self.model_path = model_path
         self.camera_resolution = camera_resolution
@@ -38,10 +60,45 @@ class HailoCameraProcessor:
         self.input_vstreams = None
         self.output_vstreams = None
         
+        # Inference pipeline is kept open for the whole run() (see start_inference)
+        self.infer_pipeline = None
+        self._infer_stack = None
+        
+        # Dynamic batching state
+        self.batch_size = max(1, batch_size)
+        self.max_batch_wait = max_batch_wait_ms / 1000.0
+        self._batch_buffer = None
+        self._batch_len = 0
+        self._batch_start = 0
+        
+        # Frame skipping and motion gate in front of inference
+        self.process_every_n_frames = max(1, process_every_n_frames)
+        self.motion_threshold = motion_threshold
+        self.scan_interval_no_motion = scan_interval_no_motion
+        self._motion_size = (160, 120)
+        self._prev_small = None
+        
+        # Capture/inference/display pipeline
+        self.low_latency = low_latency
+        self.color_preview = color_preview
+        self._stop_event = threading.Event()
+        
+        # Static status text, rendered once instead of on every frame
+        self._hailo_overlay = self.render_text_overlay("Hailo Processing Active")
+        self._camera_only_overlay = self.render_text_overlay("Camera Only Mode")
+        
         # Initialize camera
         self.camera = Picamera2()
         self.setup_camera()
         
+        # Shared memory frame bus for other processes (sized for the Y plane, the
+        # only thing published)
+        self.frame_bus = None
+        if frame_bus_name:
+            width, height = self.camera_resolution
+            self.frame_bus = FrameBus(frame_bus_name, slot_bytes=width * height)
+            print(f"Publishing frames to shared memory bus '{frame_bus_name}'")
+        
         # Initialize Hailo if available
         if HAILO_AVAILABLE and model_path:
             self.setup_hailo()
@@ -51,9 +108,12 @@ class HailoCameraProcessor:
         print("Setting up camera...")
         
         # Configure camera
+        # A single YUV420 stream: the Y plane is read directly as a grayscale image
+        # without converting the chroma planes, and the ISP writes 1.5 bytes per
+        # pixel instead of an RGB frame as well
         camera_config = self.camera.create_preview_configuration(
-            main={"size": self.camera_resolution},
-            format="RGB888",
+            main={"size": self.camera_resolution, "format": "YUV420"},
+            buffer_count=4,
             controls={"FrameRate": 9}
         )
         self.camera.configure(camera_config)
@@ -96,67 +156,279 @@ class HailoCameraProcessor:
             print(f"Error initializing Hailo: {e}")
             self.device = None
     
-    def capture_frame(self):
-        """Capture a frame from the camera"""
-        frame = self.camera.capture_array()
-        return frame
+    def start_inference(self):
+        """Open the Hailo inference pipeline once instead of once per frame"""
+        if not self.device or not self.network_group or self.infer_pipeline:
+            return
+        
+        self._infer_stack = ExitStack()
+        self.infer_pipeline = self._infer_stack.enter_context(
+            InferVStreams(self.network_group, self.input_vstreams,
+                          self.output_vstreams))
+    
+    def stop_inference(self):
+        """Close the Hailo inference pipeline"""
+        if self._infer_stack:
+            self._infer_stack.close()
+        self._infer_stack = None
+        self.infer_pipeline = None
+        self._batch_len = 0
     
     def process_with_hailo(self, frame):
-        """Process frame with Hailo accelerator"""
-        if not self.device or not self.network_group:
+        """
+        Queue a frame for batched inference on the Hailo accelerator
+        
+        Frames are copied into a preallocated batch buffer, which is submitted
+        once it is full or the oldest queued frame has waited max_batch_wait.
+        
+        Returns:
+            tuple: (results, error) where results is a list with one output
+            dict per batched frame, or None while the batch is still filling
+        """
+        if not self.infer_pipeline:
+            return None, None
+        
+        if self._batch_buffer is None or self._batch_buffer.shape[1:] != frame.shape:
+            self._batch_buffer = np.empty((self.batch_size,) + frame.shape, dtype=frame.dtype)
+            self._batch_len = 0
+        
+        if self._batch_len == 0:
+            self._batch_start = time.monotonic()
+        self._batch_buffer[self._batch_len] = frame
+        self._batch_len += 1
+        
+        if self._batch_len < self.batch_size and not self.batch_expired():
+            return None, None
+        return self.flush_batch()
+    
+    def batch_expired(self):
+        """Check whether the oldest queued frame has waited max_batch_wait or longer"""
+        return (self._batch_len > 0 and
+                time.monotonic() - self._batch_start >= self.max_batch_wait)
+    
+    def flush_batch(self):
+        """
+        Submit the queued frames to Hailo, whether or not the batch is full
+        
+        Returns:
+            tuple: (results, error) where results is a list with one output
+            dict per batched frame, or None if no frames were queued
+        """
+        if not self.infer_pipeline or self._batch_len == 0:
             return None, None
         
         try:
             # Prepare input (adjust based on your model requirements)
             # This is a placeholder - adjust based on your specific model
-            input_data = {name: frame for name in self.input_vstreams.keys()}
+            batch = self._batch_buffer[:self._batch_len]
+            input_data = {name: batch for name in self.input_vstreams.keys()}
             
             # Run inference
-            with InferVStreams(self.network_group, self.input_vstreams, 
-                            self.output_vstreams) as infer_pipeline:
-                output = infer_pipeline.infer(input_data)
+            output = self.infer_pipeline.infer(input_data)
             
-            return output, None
+            # Split batched outputs back into per-frame results
+            results = [{name: data[i] for name, data in output.items()}
+                       for i in range(self._batch_len)]
+            self._batch_len = 0
+            return results, None
         except Exception as e:
+            self._batch_len = 0
             print(f"Error during inference: {e}")
             return None, str(e)
     
+    @staticmethod
+    def render_text_overlay(text, font_scale=0.7, thickness=2, origin=(10, 30)):
+        """
+        Rasterize static text once into a mask anchored at the frame's top-left
+        
+        Returns:
+            numpy.ndarray: Boolean mask, True where the text is drawn
+        """
+        (width, height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX,
+                                                    font_scale, thickness)
+        mask = np.zeros((origin[1] + baseline + thickness, origin[0] + width + thickness), np.uint8)
+        cv2.putText(mask, text, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 255, thickness)
+        return mask > 0
+    
+    @staticmethod
+    def blit_overlay(frame, mask, color):
+        """Paint a pre-rendered text mask onto the frame in place"""
+        height = min(mask.shape[0], frame.shape[0])
+        width = min(mask.shape[1], frame.shape[1])
+        region = frame[:height, :width]
+        # Single channel (Y plane) frames get the color's brightness
+        value = max(color) if frame.ndim == 2 else color
+        region[mask[:height, :width]] = value
+        return frame
+    
     def draw_results(self, frame, results):
         """Draw inference results on frame"""
         # Placeholder for drawing results
         # Customize based on your model's output format
         if results:
-            cv2.putText(frame, "Hailo Processing Active", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            self.blit_overlay(frame, self._hailo_overlay, (0, 255, 0))
         return frame
     
+    def _put_latest(self, q, item):
+        """Put item on a bounded queue, dropping the oldest entry when full"""
+        while True:
+            try:
+                q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+    
+    def _on_frame(self, request, cap_q):
+        """
+        Pipeline stage 1: picamera2 post_callback, called for every completed request
+        
+        Runs on the camera thread while the request's buffer is still mapped, so
+        no capture_array() polling or extra request round-trip is needed.
+        """
+        if self._stop_event.is_set():
+            return
+        
+        try:
+            with MappedArray(request, "main") as mapped:
+                width, height = self.camera_resolution
+                y_plane = mapped.array[:height, :width]
+                
+                if self.frame_bus:
+                    self.frame_bus.publish(y_plane)
+                
+                # Copy out so the buffer can go straight back to the camera instead
+                # of waiting for inference and display; the color preview keeps the
+                # chroma planes too, inference still only sees the Y plane
+                yuv = mapped.array.copy() if self.color_preview else None
+                frame = yuv[:height, :width] if yuv is not None else y_plane.copy()
+        except Exception as e:
+            print(f"Capture error: {e}")
+            self._stop_event.set()
+            return
+        
+        self._put_latest(cap_q, (frame, yuv))
+    
+    def detect_motion(self, gray):
+        """
+        Check for motion against the previous frame on a 160x120 thumbnail
+        
+        Args:
+            gray: Single channel frame (the Y plane)
+        
+        Returns:
+            bool: True if the number of changed pixels, scaled back to the full
+            frame, exceeds motion_threshold
+        """
+        small = cv2.resize(gray, self._motion_size, interpolation=cv2.INTER_AREA)
+        prev_small, self._prev_small = self._prev_small, small
+        if prev_small is None:
+            return True  # First frame, assume motion
+        
+        scale = (gray.shape[0] * gray.shape[1]) / (small.shape[0] * small.shape[1])
+        return count_changed_pixels(small, prev_small, 30) * scale > self.motion_threshold
+    
+    def should_infer(self, frame, frame_count):
+        """Decide whether a frame is sent to Hailo, using frame skipping and the motion gate"""
+        motion = True
+        if self.motion_threshold is not None:
+            motion = self.detect_motion(frame)
+        
+        if motion:
+            return frame_count % self.process_every_n_frames == 0
+        if self.scan_interval_no_motion:
+            return frame_count % self.scan_interval_no_motion == 0
+        return False
+    
+    def _inference_worker(self, cap_q, infer_q):
+        """Pipeline stage 2: run Hailo inference on captured frames"""
+        results = None
+        frame_count = 0
+        while not self._stop_event.is_set():
+            try:
+                frame, yuv = cap_q.get(timeout=0.1)
+            except queue.Empty:
+                # No frames coming in: don't leave a partial batch waiting for the next one
+                if self.batch_expired():
+                    batch_results, _ = self.flush_batch()
+                    if batch_results:
+                        results = batch_results
+                continue
+            
+            frame_count += 1
+            batch_results, error = None, None
+            if self.device and self.should_infer(frame, frame_count):
+                batch_results, error = self.process_with_hailo(frame)
+            elif self.batch_expired():
+                # Frames stopped being queued (e.g. the scene went still), submit what is waiting
+                batch_results, error = self.flush_batch()
+            
+            # Keep showing the last batch until the next one completes
+            if batch_results:
+                results = batch_results
+            
+            self._put_latest(infer_q, (frame, yuv, results, error))
+    
     def run(self, display=True, max_frames=None):
-        """Main processing loop"""
+        """
+        Main processing loop
+        
+        Capture, inference and display run as three pipeline stages connected
+        by bounded queues, so each stage only waits on the slowest one.
+        """
         print("Starting camera capture loop...")
         print("Press Ctrl+C to stop")
         
         frame_count = 0
-        start_time = time.time()
+        # FPS is an exponential moving average over monotonic frame intervals
+        self.fps_ema = 0.0
+        last_frame_ns = time.monotonic_ns()
+        last_print_ns = last_frame_ns
+        
+        # Shallow queues keep frames fresh; low latency mode keeps one only
+        queue_depth = 1 if self.low_latency else 3
+        cap_q = queue.Queue(maxsize=queue_depth)
+        infer_q = queue.Queue(maxsize=queue_depth)
+        
+        self._stop_event.clear()
+        workers = [
+            threading.Thread(target=self._inference_worker, args=(cap_q, infer_q), daemon=True),
+        ]
         
         try:
-            while True:
+            self.start_inference()
+            for worker in workers:
+                worker.start()
+            
+            # Frames are pushed to us by the camera instead of being polled
+            self.camera.post_callback = lambda request: self._on_frame(request, cap_q)
+            
+            while not self._stop_event.is_set():
                 if max_frames and frame_count >= max_frames:
                     break
                 
-                # Capture frame
-                frame = self.capture_frame()
+                # Get the latest processed frame
+                try:
+                    frame, yuv, results, error = infer_q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
                 
-                # Process with Hailo if available
+                if yuv is not None:
+                    # Convert at the buffer's stride width, then crop the padding
+                    width, height = self.camera_resolution
+                    frame = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_I420)[:height, :width]
+                
+                # Draw Hailo results if available
                 if self.device:
-                    results, error = self.process_with_hailo(frame)
                     if error:
                         print(f"Inference error: {error}")
                     else:
                         frame = self.draw_results(frame, results)
                 else:
                     # Just show camera feed
-                    cv2.putText(frame, "Camera Only Mode", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+                    self.blit_overlay(frame, self._camera_only_overlay, (255, 255, 0))
                 
                 # Display frame
                 if display:
@@ -166,25 +438,41 @@ class HailoCameraProcessor:
                 
                 frame_count += 1
                 
-                # Print FPS every 30 frames
-                if frame_count % 30 == 0:
-                    elapsed = time.time() - start_time
-                    fps = frame_count / elapsed
-                    print(f"FPS: {fps:.2f}")
+                now_ns = time.monotonic_ns()
+                instant_fps = 1_000_000_000 / max(now_ns - last_frame_ns, 1)
+                self.fps_ema = instant_fps if frame_count == 1 else 0.9 * self.fps_ema + 0.1 * instant_fps
+                last_frame_ns = now_ns
+                
+                # Print FPS once per second
+                if now_ns - last_print_ns >= 1_000_000_000:
+                    print(f"FPS: {self.fps_ema:.2f}")
+                    last_print_ns = now_ns
         
         except KeyboardInterrupt:
             print("\nStopping...")
         
         finally:
+            self._stop_event.set()
+            self.camera.post_callback = None
+            for worker in workers:
+                if worker.is_alive():
+                    worker.join(timeout=2.0)
             self.cleanup()
     
     def cleanup(self):
         """Clean up resources"""
         print("Cleaning up...")
+        self.stop_inference()
         if self.camera:
+            # Frame buffers are only released here, once, at the end of the run
             self.camera.stop()
+            self.camera.close()
+            self.camera = None
         if self.device:
             self.device.release()
+        if self.frame_bus:
+            self.frame_bus.close()
+            self.frame_bus = None
         cv2.destroyAllWindows()
         print("Cleanup complete")
 
@@ -199,11 +487,21 @@ def main():
     # Set your Hailo model path here, or None for camera-only mode
     MODEL_PATH = None  # e.g., "/path/to/your/model.hef"
     CAMERA_RESOLUTION = (640, 480)
+    FRAME_BUS_NAME = None  # e.g., "security_frames" to share frames via /dev/shm
+    COLOR_PREVIEW = False  # True to display color instead of the grayscale Y plane
+    config = cfg.load_config()
     
     # Create processor
     processor = HailoCameraProcessor(
         model_path=MODEL_PATH,
-        camera_resolution=CAMERA_RESOLUTION
+        camera_resolution=CAMERA_RESOLUTION,
+        batch_size=config.get('hailo_batch_size', 8),
+        max_batch_wait_ms=config.get('hailo_max_batch_wait_ms', 100),
+        frame_bus_name=FRAME_BUS_NAME,
+        process_every_n_frames=config.get('process_every_n_frames', 2),
+        motion_threshold=config.get('motion_threshold', 5000) if config.get('motion_detection_enabled', True) else None,
+        scan_interval_no_motion=config.get('scan_interval_no_motion', 40),
+        color_preview=COLOR_PREVIEW
     )
     
     # Run processing loop
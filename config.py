@@ -6,6 +6,13 @@ Configuration management for security system
 import json
 from pathlib import Path
 
+try:
+    # Faster C JSON parser, optional
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 
 def load_config(config_file='config.json'):
     """
@@ -28,15 +35,29 @@ def load_config(config_file='config.json'):
         "location": "Room",
         "display": True,
         "process_every_n_frames": 2,
+        "hailo_batch_size": 8,
+        "hailo_max_batch_wait_ms": 100,
+        "hailo_face_detection_hef": "",
+        "hailo_face_detection_threshold": 0.5,
+        "hailo_face_encoder_hef": "",
+        "yunet_model": "",
+        "yunet_score_threshold": 0.7,
+        "face_encoder_onnx": "",
         "face_recognition_tolerance": 0.6,
+        "detection_scale": 0.25,
+        "use_lores_stream": True,
+        "detection_upsample": 0,
+        "face_tracking_between_scans": True,
+        "ann_min_faces": 100,
         "detection_cooldown": 30,
         "unauthorized_delay": 5,
         "repeat_offender_delay": 1,
         "unauthorized_memory_time": 3600,
         "same_person_alert_cooldown": 900,  # 15 minutes - prevent duplicate emails for same person
+        "alert_jpeg_quality": 85,
         "motion_detection_enabled": True,
         "motion_threshold": 5000,
-        "motion_check_interval": 10,
+        "motion_check_interval": 1,
         "scan_interval_motion": 20,
         "scan_interval_no_motion": 40,
         "min_processing_interval": 0.5,
@@ -52,8 +73,8 @@ def load_config(config_file='config.json'):
     # Load from file if exists
     if config_path.exists():
         try:
-            with open(config_path, 'r') as f:
-                user_config = json.load(f)
+            with open(config_path, 'rb') as f:
+                user_config = _json_loads(f.read())
                 # Merge with defaults
                 default_config.update(user_config)
                 # Deep merge for nested dicts
@@ -88,12 +88,18 @@ def test_unauthorized_alert():
         system.send_unauthorized_alert(test_frame, test_location, 999, "TEST")
         print(f"   ✓ Alert function completed")
         
-        # Check if file was created
-        import glob
-        files = list(system.unauthorized_dir.glob("unauthorized_*.jpg"))
+        # Photo is saved and email sent from background workers, wait for them to finish
+        print(f"   - Waiting for queued email to be sent...")
+        system.alert_executor.shutdown(wait=True)
+        system.email_sender.close(timeout=30)
+        
+        # Check if file was created (single directory scan, stat is cached per entry)
+        with os.scandir(system.unauthorized_dir) as it:
+            files = [entry for entry in it
+                     if entry.name.startswith("unauthorized_") and entry.name.endswith(".jpg")]
         if files:
-            latest = max(files, key=lambda p: p.stat().st_mtime)
-            print(f"   ✓ Photo file created: {latest}")
+            latest = max(files, key=lambda entry: entry.stat().st_mtime)
+            print(f"   ✓ Photo file created: {latest.path}")
             print(f"   - File size: {latest.stat().st_size} bytes")
         else:
             print(f"   ✗ No photo files found in {system.unauthorized_dir}")
@@ -110,6 +116,9 @@ def test_unauthorized_alert():
     print(f"   - detection_cooldown: {system.detection_cooldown} seconds")
     print(f"   - unauthorized_memory_time: {system.unauthorized_memory_time} seconds")
     
+    # Release the camera and its frame buffers
+    system.cleanup()
+    
     print(f"\n" + "=" * 60)
     print("DEBUG TEST COMPLETE")
     print("=" * 60)
@@ -120,7 +129,7 @@ def test_unauthorized_alert():
     print("4. Check console for:")
     print("   - '⚠️ UNAUTHORIZED PERSON DETECTED!'")
     print("   - 'Photo saved: ...'")
-    print("   - 'Alert email sent successfully'")
+    print("   - 'Alert email sent to ...'")
     print("5. Check folder:", system.unauthorized_dir.absolute())
     print("6. Check your email inbox")
 
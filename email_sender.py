@@ -4,95 +4,228 @@ Email notification system for security alerts
 """
 
 import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
+import threading
+import queue
+import time
+from email.message import EmailMessage
 from pathlib import Path
 import datetime
 
 
+# Alert email body, filled in with str.format_map
+BODY_TEMPLATE = """
+SECURITY ALERT
+
+An unauthorized person has been detected in your room.
+
+{detection_times}
+Location: {location}
+
+Please review the attached image.
+
+---
+This is an automated message from your Raspberry Pi Security System.
+"""
+
+
 class EmailSender:
-    def __init__(self, config):
+    # Reconnect (after a NOOP check fails) if the connection has been idle this long
+    CONNECTION_MAX_IDLE = 300
+    
+    def __init__(self, config, background=False, coalesce_wait=2.0):
         """
         Initialize email sender
         
         Args:
             config: Configuration dictionary with email settings
+            background: Send alerts from a worker thread instead of blocking the caller
+            coalesce_wait: Seconds the worker waits to merge further alerts into one email
         """
         self.config = config
-        self.smtp_server = config.get('email', {}).get('smtp_server', 'smtp.gmail.com')
-        self.smtp_port = config.get('email', {}).get('smtp_port', 587)
-        self.sender_email = config.get('email', {}).get('sender_email')
-        self.sender_password = config.get('email', {}).get('sender_password')
-        self.recipient_email = config.get('email', {}).get('recipient_email')
+        email_config = config.get('email', {})
+        self.smtp_server = email_config.get('smtp_server', 'smtp.gmail.com')
+        self.smtp_port = email_config.get('smtp_port', 587)
+        self.sender_email = email_config.get('sender_email')
+        self.sender_password = email_config.get('sender_password')
+        self.recipient_email = email_config.get('recipient_email')
+        self.location = config.get('location', 'Room')
+        self._configured = bool(self.sender_email and self.sender_password and self.recipient_email)
         
-        if not all([self.sender_email, self.sender_password, self.recipient_email]):
+        # Logged-in SMTP connection, reused between alerts
+        self._smtp = None
+        self._smtp_last_used = 0
+        self._smtp_lock = threading.Lock()
+        
+        # Background sending
+        self.coalesce_wait = coalesce_wait
+        self._queue = None
+        self._worker = None
+        if background:
+            self._queue = queue.Queue(maxsize=32)
+            self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self._worker.start()
+        
+        if not self._configured:
             print("Warning: Email configuration incomplete. Email alerts will not work.")
             print("Please configure email settings in config.json")
     
-    def send_alert(self, image_path, timestamp):
+    def send_alert(self, image_path, timestamp, image_data=None):
         """
         Send security alert email with photo
         
+        In background mode the alert is only queued and this returns immediately.
+        
         Args:
             image_path: Path to the captured image
             timestamp: Timestamp string for the detection
+            image_data: Encoded image bytes, attached instead of reading image_path
         """
-        if not all([self.sender_email, self.sender_password, self.recipient_email]):
+        if not self._configured:
             print("Cannot send email: Email configuration incomplete")
             return
         
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait((image_path, timestamp, image_data))
+            except queue.Full:
+                print("Warning: Email queue full, dropping alert")
+            return
+        
+        self._send([(image_path, timestamp, image_data)])
+    
+    def close(self, timeout=5.0):
+        """Flush queued alerts and close the SMTP connection"""
+        if self._worker and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join(timeout=timeout)
+        
+        with self._smtp_lock:
+            self._disconnect()
+    
+    def _worker_loop(self):
+        """Worker thread: send queued alerts, merging ones that arrive close together"""
+        while True:
+            alert = self._queue.get()
+            if alert is None:
+                return
+            
+            alerts = [alert]
+            stop = False
+            deadline = time.monotonic() + self.coalesce_wait
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    alert = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if alert is None:
+                    stop = True
+                    break
+                alerts.append(alert)
+            
+            try:
+                self._send(alerts)
+            except Exception:
+                pass  # Already reported by _send
+            
+            if stop:
+                return
+    
+    def _connect(self):
+        """Open and log in a new SMTP connection"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=10)
+        server.starttls()
+        server.login(self.sender_email, self.sender_password)
+        return server
+    
+    def _disconnect(self):
+        """Close the SMTP connection if open"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+    
+    def _get_connection(self):
+        """Return a logged-in SMTP connection, reconnecting if it went stale"""
+        if self._smtp is not None and time.monotonic() - self._smtp_last_used > self.CONNECTION_MAX_IDLE:
+            try:
+                self._smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                self._smtp = None
+        
+        if self._smtp is None:
+            self._smtp = self._connect()
+        
+        self._smtp_last_used = time.monotonic()
+        return self._smtp
+    
+    @staticmethod
+    def _image_subtype(image_path):
+        """MIME image subtype for a file name"""
+        suffix = Path(image_path).suffix.lower().lstrip('.')
+        return 'jpeg' if suffix in ('jpg', 'jpeg', '') else suffix
+    
+    def _send(self, alerts):
+        """
+        Build and send one email for a list of alerts
+        
+        Args:
+            alerts: List of (image_path, timestamp, image_data) tuples
+        """
+        timestamp = alerts[0][1]
+        
         try:
             # Create message
-            msg = MIMEMultipart()
+            msg = EmailMessage()
             msg['From'] = self.sender_email
             msg['To'] = self.recipient_email
             msg['Subject'] = f"SECURITY ALERT: Unauthorized Person Detected - {timestamp}"
+            if len(alerts) > 1:
+                msg['Subject'] += f" (+{len(alerts) - 1} more)"
             
             # Email body
-            body = f"""
-SECURITY ALERT
-
-An unauthorized person has been detected in your room.
-
-Detection Time: {timestamp}
-Location: {self.config.get('location', 'Room')}
-
-Please review the attached image.
-
----
-This is an automated message from your Raspberry Pi Security System.
-"""
-            msg.attach(MIMEText(body, 'plain'))
+            detection_times = "\n".join(f"Detection Time: {ts}" for _, ts, _ in alerts)
+            body = BODY_TEMPLATE.format_map({
+                'detection_times': detection_times,
+                'location': self.location,
+            })
+            msg.set_content(body)
             
-            # Attach image
-            if Path(image_path).exists():
-                try:
-                    with open(image_path, 'rb') as f:
-                        img_data = f.read()
-                        image = MIMEImage(img_data)
-                        image.add_header('Content-Disposition', 
-                                       f'attachment; filename="{Path(image_path).name}"')
-                        msg.attach(image)
-                        print(f"  Image attached: {Path(image_path).name}")
-                except Exception as e:
-                    print(f"  Warning: Could not attach image: {e}")
+            # Attach images
+            for image_path, _, image_data in alerts:
+                image_path = Path(image_path)
+                if image_data is not None or image_path.exists():
+                    try:
+                        if image_data is None:
+                            image_data = image_path.read_bytes()
+                        msg.add_attachment(image_data, maintype='image',
+                                           subtype=self._image_subtype(image_path),
+                                           filename=image_path.name)
+                        print(f"  Image attached: {image_path.name}")
+                    except Exception as e:
+                        print(f"  Warning: Could not attach image: {e}")
+                        print(f"  Email will be sent without image attachment")
+                else:
+                    print(f"  Warning: Image file not found: {image_path}")
                     print(f"  Email will be sent without image attachment")
-            else:
-                print(f"  Warning: Image file not found: {image_path}")
-                print(f"  Email will be sent without image attachment")
             
-            # Send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.sender_email, self.sender_password)
-            text = msg.as_string()
-            server.sendmail(self.sender_email, self.recipient_email, text)
-            server.quit()
+            # Send email over the shared connection, reconnecting once if the server dropped it
+            # (send_message serializes straight to bytes, no intermediate string copy)
+            with self._smtp_lock:
+                try:
+                    self._get_connection().send_message(msg, self.sender_email, [self.recipient_email])
+                except smtplib.SMTPServerDisconnected:
+                    self._smtp = None
+                    self._get_connection().send_message(msg, self.sender_email, [self.recipient_email])
             
             print(f"Alert email sent to {self.recipient_email}")
         
         except smtplib.SMTPAuthenticationError as e:
+            self._smtp = None
             error_msg = f"SMTP Authentication Error: {e}"
             print(f"Error sending email: {error_msg}")
             print("Common causes:")
@@ -101,10 +234,12 @@ This is an automated message from your Raspberry Pi Security System.
             print("  - For Gmail: Make sure 2-Factor Authentication is enabled")
             raise
         except smtplib.SMTPException as e:
+            self._disconnect()
             error_msg = f"SMTP Error: {e}"
             print(f"Error sending email: {error_msg}")
             raise
         except Exception as e:
+            self._disconnect()
             error_msg = f"Unexpected error: {e}"
             print(f"Error sending email: {error_msg}")
             import traceback
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Persistent index of authorized face encodings
+- Encodings stored as a single N x 128 float32 array (encodings.npy)
+- Matching names stored alongside in names.json
+- Source image filename, mtime and size per row in files.json, so only new or
+  changed images are re-encoded
+"""
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import face_recognition
+
+ENCODINGS_FILE = 'encodings.npy'
+NAMES_FILE = 'names.json'
+FILES_FILE = 'files.json'
+LEGACY_CACHE_FILE = '.encodings.npz'  # Separate cache of older versions, migrated on load
+ENCODING_SIZE = 128
+
+# Below this many images a worker pool costs more to start than it saves
+PARALLEL_MIN_IMAGES = 8
+
+# Supported image formats
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp']
+
+
+def empty_encodings():
+    """Return an empty encodings array with the index layout"""
+    return np.empty((0, ENCODING_SIZE), dtype=np.float32)
+
+
+def load_index(faces_dir, mmap=True):
+    """
+    Load the encodings index from the faces directory
+
+    Args:
+        faces_dir: Directory containing the index files
+        mmap: Memory-map the encodings instead of reading them into memory
+
+    Returns:
+        tuple: (encodings, names) where encodings is an N x 128 float32 array
+    """
+    faces_dir = Path(faces_dir)
+    encodings_path = faces_dir / ENCODINGS_FILE
+    names_path = faces_dir / NAMES_FILE
+
+    if not encodings_path.exists() or not names_path.exists():
+        return empty_encodings(), []
+
+    try:
+        encodings = np.load(encodings_path, mmap_mode='r' if mmap else None)
+        with open(names_path, 'r') as f:
+            names = json.load(f)
+    except Exception as e:
+        print(f"Error loading face index: {e}")
+        return empty_encodings(), []
+
+    if len(names) != len(encodings):
+        print("Warning: Face index is inconsistent, run 'manage_faces.py reindex'")
+        return empty_encodings(), []
+
+    return encodings, names
+
+
+def _load_files(faces_dir, count):
+    """
+    Load the source image of each index row
+
+    Returns:
+        list: [filename, mtime, size] per row, None for rows without one
+        (indexes written before files were recorded)
+    """
+    files_path = Path(faces_dir) / FILES_FILE
+    if not files_path.exists():
+        return [None] * count
+    try:
+        with open(files_path, 'r') as f:
+            files = json.load(f)
+    except Exception as e:
+        print(f"Error loading face index: {e}")
+        return [None] * count
+    if len(files) != count:
+        return [None] * count
+    return files
+
+
+def _file_row(image_file):
+    """Index metadata for an image file: [filename, mtime, size]"""
+    stat = os.stat(image_file)
+    return [os.path.basename(image_file), stat.st_mtime, stat.st_size]
+
+
+def _write_replace(path, write):
+    """Write a file next to path and move it into place, so readers never see it half written"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def save_index(faces_dir, encodings, names, files=None):
+    """
+    Save encodings and names to the faces directory
+
+    Args:
+        faces_dir: Directory to write the index files to
+        encodings: N x 128 encodings
+        names: N names
+        files: N [filename, mtime, size] source image entries (None = unknown)
+    """
+    faces_dir = Path(faces_dir)
+    encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+    if files is None:
+        files = [None] * len(encodings)
+
+    # Each file is replaced rather than rewritten, since a running system may
+    # have the previous encodings memory-mapped
+    _write_replace(faces_dir / ENCODINGS_FILE, lambda f: np.save(f, encodings))
+    _write_replace(faces_dir / NAMES_FILE,
+                   lambda f: f.write(json.dumps(list(names), indent=4).encode()))
+    _write_replace(faces_dir / FILES_FILE,
+                   lambda f: f.write(json.dumps(list(files)).encode()))
+
+
+def face_distances(encodings, encoding):
+    """
+    Euclidean distances from one encoding to every encoding in the index
+
+    One float32 matrix-vector product: |a - b|^2 = |a|^2 + |b|^2 - 2 a.b
+    """
+    encodings = np.asarray(encodings, dtype=np.float32)
+    probe = np.asarray(encoding, dtype=np.float32)
+    dist_sq = np.einsum('ij,ij->i', encodings, encodings) + probe @ probe - 2.0 * (encodings @ probe)
+    return np.sqrt(np.maximum(dist_sq, 0))
+
+
+def add_to_index(faces_dir, image_file, encoding):
+    """Add or replace the encoding stored for an image in the faces directory"""
+    add_many_to_index(faces_dir, [image_file], [encoding])
+
+
+def add_many_to_index(faces_dir, image_files, new_encodings):
+    """
+    Add or replace encodings for several images with a single index write
+
+    Args:
+        faces_dir: Directory containing the index files
+        image_files: Paths of the images, already copied into the faces directory
+        new_encodings: One encoding per image
+    """
+    if not image_files:
+        return
+
+    encodings, names = load_index(faces_dir, mmap=False)
+    files = _load_files(faces_dir, len(names))
+
+    new_files = [_file_row(image_file) for image_file in image_files]
+    new_names = [os.path.splitext(row[0])[0] for row in new_files]
+
+    # Rows are replaced per image file (per name for rows without one)
+    replaced_files = {row[0] for row in new_files}
+    replaced_names = set(new_names)
+    keep = [i for i, row in enumerate(files)
+            if (row[0] not in replaced_files if row is not None else names[i] not in replaced_names)]
+    new_encodings = np.asarray(new_encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+    encodings = np.vstack([encodings[keep], new_encodings])
+    names = [names[i] for i in keep] + new_names
+    files = [files[i] for i in keep] + new_files
+
+    save_index(faces_dir, encodings, names, files)
+
+
+def remove_from_index(faces_dir, name):
+    """Remove the encodings stored for a name"""
+    encodings, names = load_index(faces_dir, mmap=False)
+    files = _load_files(faces_dir, len(names))
+
+    keep = [i for i, existing in enumerate(names) if existing != name]
+    if len(keep) == len(names):
+        return
+
+    save_index(faces_dir, encodings[keep], [names[i] for i in keep], [files[i] for i in keep])
+
+
+def _encode_image(path):
+    """Encode the first face in an image file, or return None (runs in worker processes)"""
+    filename = os.path.basename(path)
+    try:
+        image = face_recognition.load_image_file(path)
+        face_encodings = face_recognition.face_encodings(image, num_jitters=1, model="small")
+    except Exception as e:
+        print(f"  Error loading {filename}: {e}")
+        return None
+    if not face_encodings:
+        print(f"  Warning: No face found in {filename}")
+        return None
+    return face_encodings[0]
+
+
+def encode_images(paths):
+    """
+    Encode the first face in each image file, on all CPU cores when there are many
+
+    Worker processes rather than threads: dlib keeps the GIL while detecting
+    and encoding faces
+
+    Returns:
+        list: One encoding per path, None where no face could be encoded
+    """
+    paths = [str(path) for path in paths]
+    workers = min(os.cpu_count() or 1, len(paths))
+    if workers < 2 or len(paths) < PARALLEL_MIN_IMAGES:
+        return [_encode_image(path) for path in paths]
+
+    # Spawned workers: the caller may already run threads (camera, reload), which fork does not copy safely
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(_encode_image, paths))
+
+
+def rebuild_index(faces_dir):
+    """
+    Rebuild the index by encoding every image in the faces directory
+
+    Returns:
+        tuple: (encodings, names) that were saved
+    """
+    return _sync_index(faces_dir, reuse_cached=False)
+
+
+def _image_entries(faces_dir):
+    """List the image files in the faces directory as os.DirEntry objects, sorted by name"""
+    with os.scandir(faces_dir) as it:
+        return sorted((entry for entry in it
+                       if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS),
+                      key=lambda entry: entry.name)
+
+
+def images_signature(faces_dir):
+    """
+    Cheap fingerprint of the images in the faces directory
+
+    Unlike the directory mtime, it also changes when an image is overwritten
+    in place (e.g. re-adding a person with manage_faces)
+
+    Returns:
+        tuple: (filename, mtime_ns, size) for every image
+    """
+    signature = []
+    for entry in _image_entries(faces_dir):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue  # Removed while listing
+        signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _load_cache(faces_dir):
+    """
+    Load the encodings already in the index as {filename: (mtime, size, encoding)}
+
+    Returns:
+        tuple: (cache, complete) where complete is False when some index rows have
+        no source image recorded, so the index has to be rewritten
+    """
+    encodings, names = load_index(faces_dir, mmap=False)
+    files = _load_files(faces_dir, len(names))
+    cache = {row[0]: (float(row[1]), int(row[2]), encoding)
+             for row, encoding in zip(files, encodings) if row is not None}
+
+    # Index from an older version: fall back on the separate encodings cache it kept
+    legacy_path = Path(faces_dir) / LEGACY_CACHE_FILE
+    if len(cache) == len(names) and (names or not legacy_path.exists()):
+        return cache, True
+
+    if not cache and legacy_path.exists():
+        try:
+            with np.load(legacy_path) as data:
+                # Caches written before sizes were recorded match on mtime alone
+                sizes = data['sizes'] if 'sizes' in data.files else [None] * len(data['files'])
+                cache = {str(filename): (float(mtime), None if size is None else int(size), encoding)
+                         for filename, mtime, size, encoding
+                         in zip(data['files'], data['mtimes'], sizes, data['encs'])}
+        except Exception as e:
+            print(f"Error loading encodings cache: {e}")
+    return cache, False
+
+
+def load_cached_encodings(faces_dir):
+    """
+    Bring the index up to date with the images in the faces directory and load it
+
+    Only images that are new or whose modification time or size changed are
+    encoded; when nothing changed the index is returned memory-mapped.
+
+    Returns:
+        tuple: (encodings, names) where encodings is an N x 128 float32 array
+    """
+    return _sync_index(faces_dir, reuse_cached=True)
+
+
+def _sync_index(faces_dir, reuse_cached):
+    """Encode the images in the faces directory into the index, reusing unchanged rows if asked"""
+    faces_dir = Path(faces_dir)
+    cache, changed = {}, True
+    if reuse_cached:
+        cache, complete = _load_cache(faces_dir)
+        changed = not complete
+
+    # scandir yields names and stat results without building a Path per entry;
+    # only images that need encoding are opened
+    entries = _image_entries(faces_dir)
+
+    # Reuse cached encodings, collecting the images that need encoding
+    rows = []  # [filename, mtime, size, encoding], encoding None until encoded
+    pending = []
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except OSError as e:
+            print(f"  Error loading {entry.name}: {e}")
+            continue
+        mtime, size = stat.st_mtime, stat.st_size
+        cached = cache.pop(entry.name, None)
+        if cached is not None and cached[0] == mtime and cached[1] in (None, size):
+            rows.append([entry.name, mtime, size, cached[2]])
+            # Record the size for entries from an older cache
+            changed = changed or cached[1] is None
+        else:
+            pending.append(len(rows))
+            rows.append([entry.name, mtime, size, None])
+
+    # Entries left in the cache belong to images that were removed
+    if not (changed or pending or cache):
+        return load_index(faces_dir)
+
+    # New and modified images are encoded together, in parallel when there are many
+    for i, encoding in zip(pending, encode_images(os.path.join(faces_dir, rows[i][0]) for i in pending)):
+        rows[i][3] = encoding
+        if encoding is not None:
+            print(f"  Encoded: {os.path.splitext(rows[i][0])[0]}")
+
+    # Images without a face are left out (and retried on the next load)
+    rows = [row for row in rows if row[3] is not None]
+    files = [row[:3] for row in rows]
+    names = [os.path.splitext(row[0])[0] for row in rows]
+    encodings = np.asarray([row[3] for row in rows], dtype=np.float32).reshape(-1, ENCODING_SIZE)
+
+    try:
+        save_index(faces_dir, encodings, names, files)
+        legacy_path = faces_dir / LEGACY_CACHE_FILE
+        if legacy_path.exists():
+            legacy_path.unlink()
+    except Exception as e:
+        print(f"Error saving face index: {e}")
+
+    return encodings, names
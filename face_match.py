@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Face encoding distance kernels
+- Nearest tracked face and repeat offender checks on 128-d encodings
+- Uses Numba JIT kernels when numba is installed, NumPy otherwise
+"""
+
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    # Explicit signatures compile (or load from the cache) at import, not on the
+    # first face detected
+    @numba.njit('i8(f4[:, ::1], f4[::1], f8)', cache=True, fastmath=True, nogil=True)
+    def _nearest_within_jit(candidates, probe, max_dist_sq):
+        # Squared distance per candidate without temporaries, giving up on a
+        # candidate as soon as it is further than the best so far
+        best = -1
+        best_dist_sq = max_dist_sq
+        for i in range(candidates.shape[0]):
+            dist_sq = 0.0
+            for j in range(candidates.shape[1]):
+                diff = candidates[i, j] - probe[j]
+                dist_sq += diff * diff
+                if dist_sq >= best_dist_sq:
+                    break
+            if dist_sq < best_dist_sq:
+                best = i
+                best_dist_sq = dist_sq
+        return best
+
+    @numba.njit('b1[::1](f4[:, ::1], f4[:, ::1], f8)', cache=True, fastmath=True, nogil=True)
+    def _any_within_jit(rows, references, max_dist_sq):
+        # Stops at the first reference within range of each row
+        result = np.zeros(rows.shape[0], dtype=np.bool_)
+        for i in range(rows.shape[0]):
+            for k in range(references.shape[0]):
+                dist_sq = 0.0
+                for j in range(rows.shape[1]):
+                    diff = rows[i, j] - references[k, j]
+                    dist_sq += diff * diff
+                    if dist_sq >= max_dist_sq:
+                        break
+                if dist_sq < max_dist_sq:
+                    result[i] = True
+                    break
+        return result
+
+
+def nearest_within(candidates, probe, max_dist_sq):
+    """
+    Find the candidate encoding closest to probe
+
+    Args:
+        candidates: N x 128 float32 encodings
+        probe: 128-d float32 encoding
+        max_dist_sq: Squared distance a match must be below
+
+    Returns:
+        int: Index of the closest candidate, or -1 if none is within range
+    """
+    if NUMBA_AVAILABLE:
+        return int(_nearest_within_jit(np.ascontiguousarray(candidates, dtype=np.float32),
+                                       np.ascontiguousarray(probe, dtype=np.float32), max_dist_sq))
+
+    diff = candidates - probe
+    dists_sq = np.einsum('ij,ij->i', diff, diff)
+    best = int(dists_sq.argmin())
+    return best if dists_sq[best] < max_dist_sq else -1
+
+
+def any_within(rows, references, max_dist_sq):
+    """
+    Check which rows lie within range of any reference encoding
+
+    Args:
+        rows: N x 128 float32 encodings
+        references: M x 128 float32 encodings
+        max_dist_sq: Squared distance a match must be below
+
+    Returns:
+        numpy array: N booleans, True where a row matches some reference
+    """
+    if NUMBA_AVAILABLE:
+        return _any_within_jit(np.ascontiguousarray(rows, dtype=np.float32),
+                               np.ascontiguousarray(references, dtype=np.float32), max_dist_sq)
+
+    # Squared distances between every row and every reference in one matrix multiply
+    dists_sq = (np.einsum('ij,ij->i', rows, rows)[:, None]
+                + np.einsum('ij,ij->i', references, references)[None, :]
+                - 2 * rows @ references.T)
+    return (dists_sq < max_dist_sq).any(axis=1)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Share camera frames between processes through shared memory (/dev/shm)
+- FrameBus: publisher that writes frames into a ring of slots
+- FrameBusReader: consumer that attaches by name and reads frames as views
+"""
+
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+# Per-slot metadata, stored in a second small shared memory block
+META_DTYPE = np.dtype([
+    ('seq', '<i8'),
+    ('timestamp', '<f8'),
+    ('shape', '<i4', (3,)),
+    ('ndim', '<i4'),
+    ('dtype', 'S8'),
+])
+
+# Header at the start of the metadata block: (latest_seq, num_slots, slot_bytes)
+HEADER_DTYPE = np.dtype('<i8')
+HEADER_SIZE = 3 * HEADER_DTYPE.itemsize
+
+
+def _meta_name(name):
+    return f"{name}_meta"
+
+
+def _meta_views(buf, num_slots):
+    """Return (header, slots) numpy views over a metadata buffer"""
+    header = np.ndarray((3,), dtype=HEADER_DTYPE, buffer=buf)
+    slots = np.ndarray((num_slots,), dtype=META_DTYPE, buffer=buf, offset=HEADER_SIZE)
+    return header, slots
+
+
+class FrameBus:
+    """Publish frames into a shared memory ring buffer"""
+
+    def __init__(self, name, slot_bytes, num_slots=4):
+        """
+        Create the shared memory ring
+
+        Args:
+            name: Shared memory name consumers attach to
+            slot_bytes: Size of one slot, must fit the largest frame published
+            num_slots: Number of frames kept in the ring
+        """
+        self.name = name
+        self.slot_bytes = slot_bytes
+        self.num_slots = num_slots
+        self._seq = 0
+
+        self.payload = shared_memory.SharedMemory(name=name, create=True, size=slot_bytes * num_slots)
+        self.meta = shared_memory.SharedMemory(name=_meta_name(name), create=True,
+                                               size=HEADER_SIZE + META_DTYPE.itemsize * num_slots)
+        self._header, self._slots = _meta_views(self.meta.buf, num_slots)
+        self._header[:] = (0, num_slots, slot_bytes)
+        self._slots[:] = np.zeros(num_slots, dtype=META_DTYPE)
+
+    def publish(self, frame, timestamp=None):
+        """Copy a frame into the next slot and make it the latest frame"""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit in {self.slot_bytes} byte slot")
+
+        seq = self._seq + 1
+        slot = seq % self.num_slots
+
+        dst = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.payload.buf,
+                         offset=slot * self.slot_bytes)
+        dst[...] = frame
+
+        shape = tuple(frame.shape) + (0,) * (3 - frame.ndim)
+        self._slots[slot] = (seq, time.time() if timestamp is None else timestamp,
+                             shape, frame.ndim, frame.dtype.str.encode())
+
+        # Publish the sequence number last so readers never see a half-written slot as latest
+        self._header[0] = seq
+        self._seq = seq
+
+    def close(self):
+        """Release and remove the shared memory"""
+        # Views must be dropped before the buffers can be closed
+        self._header = None
+        self._slots = None
+        for shm in (self.payload, self.meta):
+            shm.close()
+            shm.unlink()
+
+
+class FrameBusReader:
+    """Attach to a FrameBus and read frames without copying them"""
+
+    def __init__(self, name):
+        """
+        Attach to an existing FrameBus
+
+        Args:
+            name: Name the FrameBus was created with
+        """
+        self.name = name
+        self.meta = self._attach(_meta_name(name))
+        self.payload = self._attach(name)
+
+        header = np.ndarray((3,), dtype=HEADER_DTYPE, buffer=self.meta.buf)
+        self.num_slots = int(header[1])
+        self.slot_bytes = int(header[2])
+        self._header, self._slots = _meta_views(self.meta.buf, self.num_slots)
+
+    @staticmethod
+    def _attach(name):
+        shm = shared_memory.SharedMemory(name=name)
+        # The publisher owns the memory, stop the resource tracker unlinking it when we exit
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+    def latest(self):
+        """
+        Get the most recently published frame
+
+        The frame is a view into shared memory and will be overwritten once the
+        publisher wraps around the ring, copy it if it needs to be kept.
+
+        Returns:
+            tuple: (frame, timestamp, seq), or (None, None, 0) before the first frame
+        """
+        seq = int(self._header[0])
+        if seq == 0:
+            return None, None, 0
+
+        slot = seq % self.num_slots
+        meta = self._slots[slot]
+        if int(meta['seq']) != seq:
+            return None, None, 0
+
+        ndim = int(meta['ndim'])
+        shape = tuple(int(v) for v in meta['shape'][:ndim])
+        frame = np.ndarray(shape, dtype=np.dtype(meta['dtype'].decode()), buffer=self.payload.buf,
+                           offset=slot * self.slot_bytes)
+        return frame, float(meta['timestamp']), seq
+
+    def wait_for_frame(self, last_seq=0, timeout=1.0, poll_interval=0.005):
+        """
+        Wait until a frame newer than last_seq is published
+
+        Returns:
+            tuple: (frame, timestamp, seq), or (None, None, last_seq) on timeout
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if int(self._header[0]) > last_seq:
+                frame, timestamp, seq = self.latest()
+                if frame is not None:
+                    return frame, timestamp, seq
+            time.sleep(poll_interval)
+        return None, None, last_seq
+
+    def close(self):
+        """Detach from the shared memory"""
+        self._header = None
+        self._slots = None
+        self.payload.close()
+        self.meta.close()
+
+
+# Example usage: attach to a running publisher and report its frame rate
+if __name__ == "__main__":
+    import sys
+
+    bus_name = sys.argv[1] if len(sys.argv) > 1 else "security_frames"
+    reader = FrameBusReader(bus_name)
+    print(f"Attached to frame bus '{bus_name}' ({reader.num_slots} slots)")
+
+    seq = 0
+    count = 0
+    start_time = time.time()
+    try:
+        while True:
+            frame, timestamp, seq = reader.wait_for_frame(seq)
+            if frame is None:
+                continue
+            count += 1
+            if count % 30 == 0:
+                fps = count / (time.time() - start_time)
+                print(f"Frame {seq}: shape={frame.shape}, FPS: {fps:.2f}")
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        reader.close()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Newest-item handoff between threads
+- A camera thread puts frames, a slower consumer always takes the latest one
+- Frames the consumer did not get to are dropped instead of queuing up
+"""
+
+import threading
+from collections import deque
+
+
+class LatestFrameSlot:
+    """
+    Hand the newest item from one thread to another, dropping any item not yet taken
+
+    A deque(maxlen=1) replaces the old item atomically, so putting never blocks or locks
+    """
+
+    def __init__(self):
+        self._slot = deque(maxlen=1)
+        self._ready = threading.Event()
+
+    def put(self, item):
+        """Store item, replacing one the consumer has not taken yet"""
+        self._slot.append(item)
+        # Event.set() takes a lock; when the event is still set the consumer has not
+        # cleared it yet and will take the item just stored
+        if not self._ready.is_set():
+            self._ready.set()
+
+    def get(self, timeout=None):
+        """
+        Take the newest item
+
+        Returns:
+            The item, or None if nothing arrived within timeout
+        """
+        if not self._ready.wait(timeout):
+            return None
+        # Clear before taking, so an item put meanwhile sets the event again
+        self._ready.clear()
+        try:
+            return self._slot.popleft()
+        except IndexError:
+            return None
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Face detection on the Hailo NPU
+- Runs a face detection HEF compiled with Hailo's on-chip NMS post-processing
+- Returns boxes in face_recognition's (top, right, bottom, left) format
+"""
+
+from contextlib import ExitStack
+import cv2
+import numpy as np
+
+try:
+    from hailo_platform import (HEF, VDevice, HailoStreamInterface, ConfigureParams,
+                                InferVStreams, InputVStreamParams, OutputVStreamParams,
+                                FormatType, HailoSchedulingAlgorithm)
+    HAILO_AVAILABLE = True
+except ImportError:
+    HAILO_AVAILABLE = False
+
+
+def create_hailo_device():
+    """
+    Open the Hailo device with HailoRT's scheduler enabled, so several models
+    (face detection and face encoding) can share it without manual activation
+    """
+    params = VDevice.create_params()
+    params.scheduling_algorithm = HailoSchedulingAlgorithm.ROUND_ROBIN
+    return VDevice(params)
+
+
+class HailoFaceDetector:
+    """Face detector backed by a Hailo HEF model"""
+
+    def __init__(self, hef_path, score_threshold=0.5, device=None):
+        """
+        Load the model and open the inference pipeline
+
+        Args:
+            hef_path: Path to a face detection HEF with NMS output (face = class 0)
+            score_threshold: Minimum detection score to keep a box
+            device: Shared device from create_hailo_device() (None = open one for this detector)
+        """
+        if not HAILO_AVAILABLE:
+            raise RuntimeError("Hailo platform library not available")
+
+        self.score_threshold = score_threshold
+        self.hef = HEF(hef_path)
+        self._owns_device = device is None
+        self.device = create_hailo_device() if self._owns_device else device
+
+        configure_params = ConfigureParams.create_from_hef(self.hef, interface=HailoStreamInterface.PCIe)
+        self.network_group = self.device.configure(self.hef, configure_params)[0]
+
+        input_info = self.hef.get_input_vstream_infos()[0]
+        self.input_name = input_info.name
+        self.input_height, self.input_width = input_info.shape[:2]
+
+        # Model input is resized into the same buffer every call; the batch is a view of it
+        self._input_buffer = np.empty((self.input_height, self.input_width, 3), dtype=np.uint8)
+        self._input_batch = self._input_buffer[np.newaxis]
+
+        input_params = InputVStreamParams.make(self.network_group, format_type=FormatType.UINT8)
+        output_params = OutputVStreamParams.make(self.network_group, format_type=FormatType.FLOAT32)
+
+        # Keep the pipeline open for the detector's lifetime; the scheduler activates the network
+        self._stack = ExitStack()
+        self._pipeline = self._stack.enter_context(
+            InferVStreams(self.network_group, input_params, output_params))
+
+    def detect(self, rgb_frame):
+        """
+        Detect faces in an RGB frame
+
+        Returns:
+            list of tuples: [(top, right, bottom, left), ...] in frame coordinates
+        """
+        frame_height, frame_width = rgb_frame.shape[:2]
+        cv2.resize(rgb_frame, (self.input_width, self.input_height), dst=self._input_buffer)
+
+        outputs = self._pipeline.infer({self.input_name: self._input_batch})
+
+        # NMS-by-class output: per image, a list of [ymin, xmin, ymax, xmax, score]
+        # arrays (normalized coordinates), one per class
+        detections = next(iter(outputs.values()))[0]
+        face_boxes = detections[0] if len(detections) else []
+
+        locations = []
+        for ymin, xmin, ymax, xmax, score in face_boxes:
+            if score < self.score_threshold:
+                continue
+            top = max(0, int(ymin * frame_height))
+            right = min(frame_width, int(xmax * frame_width))
+            bottom = min(frame_height, int(ymax * frame_height))
+            left = max(0, int(xmin * frame_width))
+            locations.append((top, right, bottom, left))
+        return locations
+
+    def close(self):
+        """Close the inference pipeline and release the device if the detector opened it"""
+        self._stack.close()
+        if self._owns_device:
+            self.device.release()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Face encodings on the Hailo NPU
+- Runs a HEF compiled from the ONNX export of dlib's face recognition ResNet
+- Encodings are comparable with face_recognition.face_encodings, so stored
+  authorized faces and face_recognition_tolerance keep working
+
+Compile the model with the input normalization folded in, so the device takes
+uint8 chips straight from the aligner (Dataflow Compiler model script):
+    normalization1 = normalization([122.782, 117.001, 104.298], [256.0, 256.0, 256.0])
+"""
+
+from contextlib import ExitStack
+import numpy as np
+
+from hailo_face_detector import HAILO_AVAILABLE, create_hailo_device
+from onnx_face_encoder import face_chips
+
+if HAILO_AVAILABLE:
+    from hailo_platform import (HEF, HailoStreamInterface, ConfigureParams, InferVStreams,
+                                InputVStreamParams, OutputVStreamParams, FormatType)
+
+
+class HailoFaceEncoder:
+    """Compute 128-d face encodings with a Hailo HEF model"""
+
+    def __init__(self, hef_path, device=None):
+        """
+        Load the model and open the inference pipeline
+
+        Args:
+            hef_path: HEF taking 150 x 150 x 3 uint8 RGB chips and returning 128-d encodings
+            device: Shared device from create_hailo_device() (None = open one for this encoder)
+        """
+        if not HAILO_AVAILABLE:
+            raise RuntimeError("Hailo platform library not available")
+
+        self.hef = HEF(hef_path)
+        self._owns_device = device is None
+        self.device = create_hailo_device() if self._owns_device else device
+
+        configure_params = ConfigureParams.create_from_hef(self.hef, interface=HailoStreamInterface.PCIe)
+        self.network_group = self.device.configure(self.hef, configure_params)[0]
+        self.input_name = self.hef.get_input_vstream_infos()[0].name
+
+        input_params = InputVStreamParams.make(self.network_group, format_type=FormatType.UINT8)
+        output_params = OutputVStreamParams.make(self.network_group, format_type=FormatType.FLOAT32)
+
+        # Keep the pipeline open for the encoder's lifetime; the scheduler activates the network
+        self._stack = ExitStack()
+        self._pipeline = self._stack.enter_context(
+            InferVStreams(self.network_group, input_params, output_params))
+
+    def encode(self, rgb_frame, face_locations):
+        """
+        Encode faces at the given locations, like face_recognition.face_encodings
+
+        Returns:
+            list of numpy arrays: One 128-d encoding per face location
+        """
+        if not face_locations:
+            return []
+
+        # All faces go through the network in one batch
+        chips = np.ascontiguousarray(face_chips(rgb_frame, face_locations))
+        outputs = self._pipeline.infer({self.input_name: chips})
+
+        encodings = next(iter(outputs.values())).reshape(len(chips), -1)
+        return list(encodings)
+
+    def close(self):
+        """Close the inference pipeline and release the device if the encoder opened it"""
+        self._stack.close()
+        if self._owns_device:
+            self.device.release()
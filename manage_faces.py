@@ -6,12 +6,14 @@ Utility script to manage authorized faces database
 - Remove faces
 """
 
+import os
 import sys
 import argparse
 from pathlib import Path
 import face_recognition
 import cv2
 import config as cfg
+import face_index
 
 
 def add_face(image_path, name=None):
@@ -38,7 +40,7 @@ def add_face(image_path, name=None):
     # Check if face exists in image
     try:
         image = face_recognition.load_image_file(str(image_path))
-        encodings = face_recognition.face_encodings(image)
+        encodings = face_recognition.face_encodings(image, num_jitters=1, model="small")
         
         if not encodings:
             print(f"Error: No face found in {image_path}")
@@ -47,6 +49,15 @@ def add_face(image_path, name=None):
         if len(encodings) > 1:
             print(f"Warning: Multiple faces found in {image_path}. Using the first one.")
         
+        # Warn if this person is already enrolled under another name (bringing the
+        # index up to date first, in case images were copied in by hand)
+        known_encodings, known_names = face_index.load_cached_encodings(faces_dir)
+        if known_names:
+            distances = face_index.face_distances(known_encodings, encodings[0])
+            best = int(distances.argmin())
+            if distances[best] < config.get('face_recognition_tolerance', 0.6) and known_names[best] != name:
+                print(f"Warning: This face looks like existing authorized face '{known_names[best]}'")
+        
         # Save to faces directory
         output_path = faces_dir / f"{name}{image_path.suffix}"
         
@@ -54,6 +65,9 @@ def add_face(image_path, name=None):
         import shutil
         shutil.copy2(image_path, output_path)
         
+        # Store encoding so it doesn't have to be recomputed at startup
+        face_index.add_to_index(faces_dir, output_path, encodings[0])
+        
         print(f"✓ Added face: {name}")
         print(f"  Saved to: {output_path}")
         return True
@@ -63,6 +77,62 @@ def add_face(image_path, name=None):
         return False
 
 
+def add_faces_bulk(directory):
+    """
+    Add every face image in a directory to the authorized faces database
+    
+    Each image is named after its filename. Encodings are collected for all
+    images and written to the index in one go.
+    
+    Args:
+        directory: Directory containing face images
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        print(f"Error: Directory not found: {directory}")
+        return False
+    
+    config = cfg.load_config()
+    faces_dir = Path(config['faces_directory'])
+    faces_dir.mkdir(exist_ok=True)
+    
+    image_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
+    with os.scandir(directory) as it:
+        image_paths = sorted(Path(entry.path) for entry in it
+                             if entry.is_file() and entry.name.lower().endswith(image_extensions))
+    
+    if not image_paths:
+        print(f"No images found in {directory}")
+        return False
+    
+    import shutil
+    added_paths = []
+    encodings = []
+    for image_path in image_paths:
+        try:
+            image = face_recognition.load_image_file(str(image_path))
+            # Detect once and reuse the locations for encoding
+            face_locations = face_recognition.face_locations(image, model="hog")
+            if not face_locations:
+                print(f"  Warning: No face found in {image_path.name}")
+                continue
+            if len(face_locations) > 1:
+                print(f"  Warning: Multiple faces found in {image_path.name}. Using the first one.")
+            
+            encoding = face_recognition.face_encodings(image, face_locations[:1], num_jitters=1, model="small")[0]
+            output_path = faces_dir / image_path.name
+            shutil.copy2(image_path, output_path)
+            added_paths.append(output_path)
+            encodings.append(encoding)
+            print(f"  ✓ Added face: {image_path.stem}")
+        except Exception as e:
+            print(f"  Error processing {image_path.name}: {e}")
+    
+    face_index.add_many_to_index(faces_dir, added_paths, encodings)
+    print(f"✓ Added {len(added_paths)} of {len(image_paths)} face(s)")
+    return bool(added_paths)
+
+
 def list_faces():
     """List all authorized faces"""
     config = cfg.load_config()
@@ -72,8 +142,9 @@ def list_faces():
         print("No faces directory found.")
         return
     
-    image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-    faces = [f for f in faces_dir.iterdir() if f.suffix.lower() in image_extensions]
+    image_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
+    with os.scandir(faces_dir) as it:
+        faces = [entry.name for entry in it if entry.name.lower().endswith(image_extensions)]
     
     if not faces:
         print("No authorized faces found.")
@@ -81,8 +152,8 @@ def list_faces():
     
     print(f"\nAuthorized Faces ({len(faces)}):")
     print("-" * 40)
-    for face_file in sorted(faces):
-        print(f"  - {face_file.stem}")
+    for face_name in sorted(faces):
+        print(f"  - {os.path.splitext(face_name)[0]}")
     print()
 
 
@@ -95,14 +166,12 @@ def remove_face(name):
         print("No faces directory found.")
         return False
     
-    # Find matching files
-    image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-    matches = []
-    
-    for ext in image_extensions:
-        face_file = faces_dir / f"{name}{ext}"
-        if face_file.exists():
-            matches.append(face_file)
+    # Find matching files with a single directory listing
+    image_extensions = ('.jpg', '.jpeg', '.png', '.bmp')
+    with os.scandir(faces_dir) as it:
+        matches = [Path(entry.path) for entry in it
+                   if os.path.splitext(entry.name)[0] == name
+                   and entry.name.lower().endswith(image_extensions)]
     
     if not matches:
         print(f"No face found with name: {name}")
@@ -112,6 +181,23 @@ def remove_face(name):
         match.unlink()
         print(f"✓ Removed: {name}")
     
+    face_index.remove_from_index(faces_dir, name)
+    
+    return True
+
+
+def reindex_faces():
+    """Rebuild the encodings index from all images in the faces directory"""
+    config = cfg.load_config()
+    faces_dir = Path(config['faces_directory'])
+    
+    if not faces_dir.exists():
+        print("No faces directory found.")
+        return False
+    
+    print("Rebuilding face index...")
+    encodings, names = face_index.rebuild_index(faces_dir)
+    print(f"✓ Indexed {len(names)} face(s)")
     return True
 
 
@@ -124,8 +210,9 @@ def capture_face_from_camera(name):
     print("Position yourself in front of the camera...")
     
     camera = Picamera2()
+    # picamera2's RGB888 is stored as B, G, R - already in OpenCV's order
     camera_config = camera.create_preview_configuration(
-        main={"size": (1280, 720)}
+        main={"size": (1280, 720), "format": "RGB888"}
     )
     camera.configure(camera_config)
     camera.start()
@@ -133,14 +220,20 @@ def capture_face_from_camera(name):
     
     print("Press SPACE to capture, ESC to cancel")
     
+    # Detect on a downscaled frame, boxes are scaled back up for drawing
+    detection_scale = cfg.load_config().get('detection_scale', 0.25)
+    
     try:
         while True:
-            frame = camera.capture_array()
-            frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+            frame_bgr = camera.capture_array()
             
-            # Try to detect face
-            rgb_frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            face_locations = face_recognition.face_locations(rgb_frame)
+            # Try to detect face (HOG only needs luminance, so convert once to gray)
+            gray_frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2GRAY)
+            small_gray = cv2.resize(gray_frame, (0, 0), fx=detection_scale, fy=detection_scale,
+                                    interpolation=cv2.INTER_AREA)
+            face_locations = face_recognition.face_locations(small_gray, model="hog",
+                                                             number_of_times_to_upsample=0)
+            face_locations = [tuple(int(v / detection_scale) for v in loc) for loc in face_locations]
             
             if face_locations:
                 top, right, bottom, left = face_locations[0]
@@ -163,6 +256,11 @@ def capture_face_from_camera(name):
                     
                     output_path = faces_dir / f"{name}.jpg"
                     cv2.imwrite(str(output_path), frame_bgr)
+                    
+                    rgb_frame = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+                    encodings = face_recognition.face_encodings(rgb_frame, face_locations[:1], num_jitters=1, model="small")
+                    if encodings:
+                        face_index.add_to_index(faces_dir, output_path, encodings[0])
                     print(f"✓ Face captured and saved: {output_path}")
                     break
                 else:
@@ -185,6 +283,10 @@ def main():
     add_parser.add_argument('image', help='Path to image file')
     add_parser.add_argument('-n', '--name', help='Name for the person')
     
+    # Add all faces in a directory
+    bulk_parser = subparsers.add_parser('add-bulk', help='Add all face images in a directory')
+    bulk_parser.add_argument('directory', help='Directory of images, named after each person')
+    
     # Capture from camera
     capture_parser = subparsers.add_parser('capture', help='Capture face from camera')
     capture_parser.add_argument('name', help='Name for the person')
@@ -196,16 +298,23 @@ def main():
     remove_parser = subparsers.add_parser('remove', help='Remove a face')
     remove_parser.add_argument('name', help='Name of the person to remove')
     
+    # Rebuild encodings index
+    subparsers.add_parser('reindex', help='Rebuild the face encodings index')
+    
     args = parser.parse_args()
     
     if args.command == 'add':
         add_face(args.image, args.name)
+    elif args.command == 'add-bulk':
+        add_faces_bulk(args.directory)
     elif args.command == 'capture':
         capture_face_from_camera(args.name)
     elif args.command == 'list':
         list_faces()
     elif args.command == 'remove':
         remove_face(args.name)
+    elif args.command == 'reindex':
+        reindex_faces()
     else:
         parser.print_help()
 
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Motion detection kernels
+- Counts changed pixels between two grayscale frames in a single pass
+- Uses a Numba JIT kernel when numba is installed, OpenCV and NumPy otherwise
+"""
+
+import cv2
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, boundscheck=False, nogil=True)
+    def _count_changed_pixels_jit(current, previous, threshold):
+        # Fused |a - b| > threshold and count, no temporary arrays;
+        # LLVM vectorizes this loop (NEON on the Pi 5)
+        a = current.ravel()
+        b = previous.ravel()
+        count = 0
+        for i in range(a.size):
+            diff = np.int16(a[i]) - np.int16(b[i])
+            if diff > threshold or -diff > threshold:
+                count += 1
+        return count
+
+
+def count_changed_pixels(current, previous, threshold=30):
+    """
+    Count pixels whose absolute difference exceeds threshold
+
+    Args:
+        current: Grayscale uint8 frame
+        previous: Grayscale uint8 frame of the same shape
+        threshold: Per-pixel difference that counts as changed
+
+    Returns:
+        int: Number of changed pixels
+    """
+    if NUMBA_AVAILABLE:
+        return int(_count_changed_pixels_jit(np.ascontiguousarray(current),
+                                             np.ascontiguousarray(previous), threshold))
+
+    # Saturating absdiff in OpenCV, then compare and count as one boolean mask
+    return int(np.count_nonzero(cv2.absdiff(current, previous) > threshold))
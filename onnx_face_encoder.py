@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Face encodings with an ONNX Runtime model
+- Runs an ONNX export of dlib's face recognition ResNet (e.g. INT8 quantized)
+- Encodings are comparable with face_recognition.face_encodings, so stored
+  authorized faces and face_recognition_tolerance keep working
+
+Quantize an exported model with calibration chips from the faces directory:
+    onnxruntime.quantization.quantize_static(model_fp32, model_int8, calibration_reader)
+"""
+
+import numpy as np
+import dlib
+import face_recognition_models
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+# dlib's face recognition network input: 150x150 aligned RGB chips,
+# mean-subtracted and scaled by 1/256
+CHIP_SIZE = 150
+CHIP_PADDING = 0.25
+CHIP_MEAN = np.array([122.782, 117.001, 104.298], dtype=np.float32)
+CHIP_SCALE = 1.0 / 256.0
+
+# face_recognition's 5 point landmark model, loaded on first use
+_pose_predictor = None
+
+
+def face_chips(rgb_frame, face_locations):
+    """
+    Align faces the same way face_recognition does (5 point landmarks)
+
+    Returns:
+        numpy array: N x 150 x 150 x 3 uint8 RGB chips, one per face location
+    """
+    global _pose_predictor
+    if _pose_predictor is None:
+        _pose_predictor = dlib.shape_predictor(
+            face_recognition_models.pose_predictor_five_point_model_location())
+
+    landmarks = dlib.full_object_detections()
+    for top, right, bottom, left in face_locations:
+        landmarks.append(_pose_predictor(rgb_frame, dlib.rectangle(left, top, right, bottom)))
+    return np.asarray(dlib.get_face_chips(rgb_frame, landmarks, size=CHIP_SIZE, padding=CHIP_PADDING))
+
+
+class OnnxFaceEncoder:
+    """Compute 128-d face encodings with ONNX Runtime"""
+
+    def __init__(self, model_path, num_threads=None):
+        """
+        Load the model
+
+        Args:
+            model_path: ONNX model taking N x 3 x 150 x 150 float32 chips and returning N x 128 encodings
+            num_threads: Intra-op threads for ONNX Runtime (None = runtime default)
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime not available")
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def encode(self, rgb_frame, face_locations):
+        """
+        Encode faces at the given locations, like face_recognition.face_encodings
+
+        Returns:
+            list of numpy arrays: One 128-d encoding per face location
+        """
+        if not face_locations:
+            return []
+
+        chips = face_chips(rgb_frame, face_locations)
+
+        # All faces go through the network in one batch (NHWC -> NCHW)
+        batch = (chips.astype(np.float32) - CHIP_MEAN) * CHIP_SCALE
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+        encodings = self.session.run(None, {self.input_name: batch})[0]
+        return list(encodings)
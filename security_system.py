@@ -9,24 +9,53 @@ Raspberry Pi 5 Security System with Face Recognition
 import cv2
 import numpy as np
 import face_recognition
+import dlib
 import os
 import json
 import time
 import datetime
 import threading
-from queue import Queue
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from picamera2 import Picamera2
 from email_sender import EmailSender
 from voice_features import VoiceSystem
+from hailo_face_detector import HailoFaceDetector, HAILO_AVAILABLE, create_hailo_device
+from hailo_face_encoder import HailoFaceEncoder
+from onnx_face_encoder import OnnxFaceEncoder, ONNXRUNTIME_AVAILABLE
+import face_index
+from motion import count_changed_pixels
+from frame_slot import LatestFrameSlot
+from face_match import nearest_within, any_within
 import config
 
+if not HAILO_AVAILABLE:
+    print("Note: Hailo not available, using CPU-based face recognition")
+
+# dlib's face encoding network runs several times slower without BLAS (e.g. a
+# build that did not find libopenblas-dev)
+if not getattr(dlib, 'DLIB_USE_BLAS', True):
+    print("Note: dlib was built without BLAS, face encodings will be slow (see README, Performance Issues)")
+
 try:
-    from hailo_platform import Device, VStreams, ConfigureParams, InferVStreams
-    HAILO_AVAILABLE = True
+    # libjpeg-turbo based encoder that picamera2 itself uses
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
 except ImportError:
-    HAILO_AVAILABLE = False
-    print("Note: Hailo not available, using CPU-based face recognition")
+    SIMPLEJPEG_AVAILABLE = False
+
+try:
+    # Approximate nearest neighbour search for large face databases
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+# Per-frame OpenCV work is done on small thumbnails or the camera's lores stream, where
+# GPU upload/download would cost more than the ops themselves, and the Pi 5 GPU has no
+# production OpenCL driver; keep OpenCV from probing for an OpenCL device
+cv2.ocl.setUseOpenCL(False)
 
 
 class SecuritySystem:
@@ -36,7 +65,7 @@ class SecuritySystem:
         self.camera = None
         self.known_faces = []
         self.known_names = []
-        self.email_sender = EmailSender(self.config)
+        self.email_sender = EmailSender(self.config, background=True)
         self.voice_system = VoiceSystem() if self.config.get('enable_voice', False) else None
         
         # Create necessary directories
@@ -48,20 +77,89 @@ class SecuritySystem:
         # Load authorized faces
         self.load_authorized_faces()
         
+        # One Hailo device shared by the detection and encoding models, if any is configured
+        self.hailo_device = None
+        hailo_hef = self.config.get('hailo_face_detection_hef')
+        hailo_encoder_hef = self.config.get('hailo_face_encoder_hef')
+        if HAILO_AVAILABLE and (hailo_hef or hailo_encoder_hef):
+            try:
+                self.hailo_device = create_hailo_device()
+            except Exception as e:
+                print(f"Error opening Hailo device, using CPU: {e}")
+        
+        # Face detection on the Hailo NPU if a model is configured (CPU HOG otherwise)
+        self.hailo_detector = None
+        if self.hailo_device and hailo_hef:
+            try:
+                self.hailo_detector = HailoFaceDetector(
+                    hailo_hef, self.config.get('hailo_face_detection_threshold', 0.5),
+                    device=self.hailo_device)
+                print(f"Hailo face detection enabled: {hailo_hef}")
+            except Exception as e:
+                print(f"Error initializing Hailo face detection, using CPU: {e}")
+        
+        # YuNet CNN face detector through OpenCV if a model is configured and Hailo isn't used
+        self.yunet_detector = None
+        yunet_model = self.config.get('yunet_model')
+        if yunet_model and not self.hailo_detector:
+            try:
+                self.yunet_detector = cv2.FaceDetectorYN.create(
+                    yunet_model, '', (320, 240),
+                    score_threshold=self.config.get('yunet_score_threshold', 0.7))
+                print(f"YuNet face detection enabled: {yunet_model}")
+            except Exception as e:
+                print(f"Error loading YuNet face detector, using HOG: {e}")
+        
+        # Face encodings on the Hailo NPU or through ONNX Runtime if a model is configured (dlib otherwise)
+        self.face_encoder = None
+        if self.hailo_device and hailo_encoder_hef:
+            try:
+                self.face_encoder = HailoFaceEncoder(hailo_encoder_hef, device=self.hailo_device)
+                print(f"Hailo face encoder enabled: {hailo_encoder_hef}")
+            except Exception as e:
+                print(f"Error initializing Hailo face encoder: {e}")
+        encoder_model = self.config.get('face_encoder_onnx')
+        if encoder_model and not self.face_encoder:
+            if ONNXRUNTIME_AVAILABLE:
+                try:
+                    self.face_encoder = OnnxFaceEncoder(encoder_model)
+                    print(f"ONNX face encoder enabled: {encoder_model}")
+                except Exception as e:
+                    print(f"Error loading ONNX face encoder, using dlib: {e}")
+            else:
+                print("Note: onnxruntime not available, using dlib face encoder")
+        
         # Initialize camera
         self.setup_camera()
         
         # Detection state
         self.last_detection_time = {}
+        self.detection_scale = self.config.get('detection_scale', 0.25)  # Downscale factor for face detection
+        self.face_recognition_tolerance = float(self.config.get('face_recognition_tolerance', 0.6))
+        self.detection_upsample = self.config.get('detection_upsample', 0)  # HOG pyramid upsampling (0 = fastest)
+        self.rgb_buffer = None  # Reused RGB frame for detection, allocated on first use
+        
+        # Lightweight trackers that follow detected faces between detection frames
+        self.face_tracking_between_scans = self.config.get('face_tracking_between_scans', True)
+        self.face_trackers = []  # [(tracker, name), ...] - name is None for unrecognized faces
         self.detection_cooldown = self.config.get('detection_cooldown', 30)  # seconds
         
         # Face tracking for 5-second delay before alert
-        self.face_tracking = {}  # Track faces: {face_id: {'first_seen': time, 'ever_authorized': bool, 'location': tuple, 'frame': array}}
+        # Track faces: {face_id: {'first_seen': time, 'ever_authorized': bool, 'location': tuple, 'frame': array, 'is_repeat': bool}}
+        # 'frame' is a shared reference to the scanned frame (never copied per face), faces
+        # from the same scan point at the same array; only kept for faces never authorized
+        self.face_tracking = {}
         self.face_tracking_lock = threading.Lock()
+        self.tracking_snapshot = ()  # (first_seen, location, is_repeat) of unauthorized faces, for the display
+        self._next_face_id = itertools.count()  # IDs are never reused after a face is removed
         self.unauthorized_delay = self.config.get('unauthorized_delay', 5)  # seconds to wait before alert
         
         # Track previously detected unauthorized persons (for repeat offenders)
-        self.previously_unauthorized = []  # List of face encodings that were previously unauthorized
+        # Ring buffer of encodings that triggered alerts; the oldest slot is overwritten when full
+        # and a slot counts only while its timestamp is within unauthorized_memory_time
+        self.previously_unauthorized = np.zeros((256, 128), dtype=np.float32)
+        self.previously_unauthorized_times = np.full(256, -np.inf)
+        self.previously_unauthorized_next = 0
         self.previously_unauthorized_lock = threading.Lock()
         self.repeat_offender_delay = self.config.get('repeat_offender_delay', 1)  # Shorter delay for repeat offenders
         self.unauthorized_memory_time = self.config.get('unauthorized_memory_time', 3600)  # Remember for 1 hour (3600 seconds)
@@ -71,23 +169,36 @@ class SecuritySystem:
         self.face_alert_times_lock = threading.Lock()
         self.same_person_alert_cooldown = self.config.get('same_person_alert_cooldown', 900)  # 15 minutes default
         
+        # Alert photos are encoded and saved off the processing thread, one at a time
+        self.alert_jpeg_quality = int(self.config.get('alert_jpeg_quality', 85))  # 85 looks the same as 95, encodes faster
+        self.alert_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert")
+        self.alert_slots = threading.BoundedSemaphore(16)  # Alerts waiting on the alert thread (extra alerts are dropped)
+        
         # Threading for smooth camera feed
-        self.frame_queue = Queue(maxsize=2)  # Keep only latest frames
-        self.latest_results = {'recognized': [], 'unrecognized': []}
-        self.results_lock = threading.Lock()
+        self.frame_slot = LatestFrameSlot()  # Newest (frame, lores frame) for the processing thread
+        self.display_enabled = bool(self.config.get('display', True))  # False when running headless
+        self.display_size = tuple(self.config.get('display_size', [640, 480]))
+        self.display_buffer = None  # Reused display frame, allocated on first use
+        self.latest_results = {'recognized': (), 'unrecognized': ()}  # Replaced as a whole, holds tuples
         self.processing_thread = None
+        self.capture_slot = LatestFrameSlot()  # Newest (frame, lores frame) from the capture thread
+        self.capture_thread = None
+        self.reload_thread = None
         self.running = False
         
         # Motion detection for adaptive scanning (reduces frequency, never stops)
         self.motion_detection_enabled = self.config.get('motion_detection_enabled', True)
         self.motion_threshold = self.config.get('motion_threshold', 5000)  # Sensitivity threshold
-        self.motion_check_interval = self.config.get('motion_check_interval', 10)  # Check every N frames
-        self.previous_frame = None
+        self.motion_check_interval = self.config.get('motion_check_interval', 1)  # Check every N frames (the check is cheap)
+        self.previous_frame = None  # Grayscale thumbnail background for motion detection
+        self.empty_scan_thumbnail = None  # Thumbnail of the last scan, if it found no faces
+        self.empty_scan_time = float('-inf')
+        self.empty_scan_max_age = 30  # Seconds a quiet scene may go without a full scan
         self.motion_detected = True  # Start with motion detected to begin scanning
         self.scan_interval_motion = self.config.get('scan_interval_motion', 20)  # Scan every N frames when motion detected
         self.scan_interval_no_motion = self.config.get('scan_interval_no_motion', 40)  # Scan every N frames when no motion
         self.min_processing_interval = self.config.get('min_processing_interval', 0.5)  # Minimum seconds between processing
-        self.last_processing_time = 0
+        self.last_processing_time = float('-inf')
         
         print(f"Security system initialized with {len(self.known_faces)} authorized faces")
         if self.motion_detection_enabled:
@@ -95,81 +206,188 @@ class SecuritySystem:
     
     def setup_camera(self):
         """Configure and start the Raspberry Pi camera"""
+        if self.camera is not None:
+            # Already configured, restart it without reallocating frame buffers
+            self.camera.start()
+            return
+        
         print("Setting up camera...")
         self.camera = Picamera2()
         
         # Get FPS setting from config (default to 9)
         target_fps = self.config.get('camera_fps', 9)
         
-        # Configure camera
-        camera_config = self.camera.create_preview_configuration(
-            main={"size": tuple(self.config['camera_resolution'])},
-            controls={"FrameRate": target_fps}
-        )
-        self.camera.configure(camera_config)
+        # Configure camera with a fixed buffer pool, allocated once for the
+        # lifetime of the system to avoid fragmenting the CMA heap.
+        # picamera2's RGB888 is stored as B, G, R - already in OpenCV's order,
+        # so captured frames need no colour conversion
+        main_size = tuple(self.config['camera_resolution'])
+        camera_config = None
+        
+        # Let the ISP produce the downscaled detection frame as a second (lores) stream
+        detection_scale = self.config.get('detection_scale', 0.25)
+        self.lores_size = None
+        if self.config.get('use_lores_stream', True) and detection_scale < 1.0:
+            # Stream sizes must be even
+            lores_size = tuple(int(v * detection_scale) // 2 * 2 for v in main_size)
+            try:
+                camera_config = self.camera.create_preview_configuration(
+                    main={"size": main_size, "format": "RGB888"},
+                    lores={"size": lores_size, "format": "RGB888"},
+                    buffer_count=4,
+                    controls={"FrameRate": target_fps}
+                )
+                self.camera.configure(camera_config)
+                self.lores_size = lores_size
+            except Exception as e:
+                # Older ISPs (Pi 4 and earlier) only offer YUV lores streams
+                print(f"Note: RGB lores stream not available, resizing in software: {e}")
+                camera_config = None
+        
+        if camera_config is None:
+            camera_config = self.camera.create_preview_configuration(
+                main={"size": main_size, "format": "RGB888"},
+                buffer_count=4,
+                controls={"FrameRate": target_fps}
+            )
+            self.camera.configure(camera_config)
         self.camera.start()
         time.sleep(2)  # Allow camera to stabilize
         print(f"Camera initialized at {self.config['camera_resolution']} @ {target_fps} FPS")
+        if self.lores_size:
+            print(f"Detection frames from lores stream at {self.lores_size}")
     
     def load_authorized_faces(self):
-        """Load all authorized faces from the faces directory"""
+        """
+        Load all authorized faces from the faces directory
+        
+        Safe to call while the processing thread is running: the new faces replace
+        the old ones only once they are fully loaded
+        """
         print("Loading authorized faces...")
-        self.known_faces = []
-        self.known_names = []
         
         if not self.faces_dir.exists():
             print(f"Faces directory {self.faces_dir} does not exist. Creating it...")
             self.faces_dir.mkdir(parents=True, exist_ok=True)
+            self.faces_signature = ()
+            self.known_faces = face_index.empty_encodings()
+            self.known_names = []
+            self.update_known_faces_matrix()
             return
         
-        # Supported image formats
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
+        # Fingerprint the images before loading, so a change made while encoding
+        # triggers another reload
+        self.faces_signature = face_index.images_signature(self.faces_dir)
         
-        for image_file in self.faces_dir.iterdir():
-            if image_file.suffix.lower() in image_extensions:
-                try:
-                    # Load image
-                    image = face_recognition.load_image_file(str(image_file))
-                    # Find face encodings
-                    encodings = face_recognition.face_encodings(image)
-                    
-                    if encodings:
-                        # Use the first face found in the image
-                        self.known_faces.append(encodings[0])
-                        # Use filename (without extension) as the name
-                        name = image_file.stem
-                        self.known_names.append(name)
-                        print(f"  Loaded: {name}")
-                    else:
-                        print(f"  Warning: No face found in {image_file.name}")
-                
-                except Exception as e:
-                    print(f"  Error loading {image_file.name}: {e}")
+        # Only images added or modified since the last load are re-encoded
+        encodings, names = face_index.load_cached_encodings(self.faces_dir)
+        
+        self.known_faces = encodings  # N x 128 float32 array, kept as loaded
+        self.known_names = names
         
+        self.update_known_faces_matrix()
         print(f"Loaded {len(self.known_faces)} authorized faces")
     
-    def recognize_face(self, frame):
+    def faces_directory_changed(self):
+        """Check whether images in the faces directory were added, removed or replaced"""
+        try:
+            # Name, mtime and size per image: overwriting a file in place leaves the
+            # directory's own mtime unchanged
+            return face_index.images_signature(self.faces_dir) != self.faces_signature
+        except OSError:
+            return False
+    
+    def reload_faces_thread(self):
+        """Background thread that reloads authorized faces when the faces directory changes"""
+        while self.running:
+            time.sleep(1.0)
+            try:
+                if self.faces_directory_changed():
+                    self.load_authorized_faces()
+            except Exception as e:
+                print(f"Error reloading authorized faces: {e}")
+    
+    def update_known_faces_matrix(self):
+        """Stack known encodings into an L2-normalized matrix for batched cosine matching"""
+        if len(self.known_faces):
+            # Kept as float32 rather than quantized: matching is one BLAS sgemm, which NumPy
+            # has no int8 equivalent for, and even 1000 faces (512 KB) stay cache resident
+            known_faces_mat = np.array(self.known_faces, dtype=np.float32)  # Copy, normalized in place
+            # Unit rows turn matching into a dot product: |a - b|^2 = 2 - 2 a.b
+            known_faces_mat /= np.maximum(np.linalg.norm(known_faces_mat, axis=1, keepdims=True), 1e-12)
+            known_faces_mat = np.ascontiguousarray(known_faces_mat)
+        else:
+            known_faces_mat = np.empty((0, 128), dtype=np.float32)
+        
+        # Large databases use an HNSW index for sub-linear lookups; a brute-force
+        # matrix multiply is faster for a handful of faces
+        known_faces_ann = None
+        if HNSWLIB_AVAILABLE and len(known_faces_mat) >= self.config.get('ann_min_faces', 100):
+            # Inner product space returns 1 - a.b for the unit vectors
+            known_faces_ann = hnswlib.Index(space='ip', dim=known_faces_mat.shape[1])
+            known_faces_ann.init_index(max_elements=len(known_faces_mat), ef_construction=100, M=16)
+            known_faces_ann.add_items(known_faces_mat, np.arange(len(known_faces_mat)))
+            known_faces_ann.set_ef(50)
+        
+        # Published together in one assignment so recognize_face never pairs the
+        # matrix of one load with the names of another
+        self.known_faces_lookup = (known_faces_mat, known_faces_ann, list(self.known_names))
+    
+    def recognize_face(self, frame, small_frame=None):
         """
         Recognize faces in the frame (optimized for performance)
         
+        Args:
+            frame: Full resolution BGR frame
+            small_frame: Matching downscaled BGR frame (e.g. from the lores stream),
+                resized from frame when not given
+        
         Returns:
             list of tuples: [(name, location, encoding), ...] for recognized faces
             list of tuples: [(location, encoding), ...] for unrecognized faces
         """
         # Resize frame to smaller size for faster processing (maintains aspect ratio)
-        # Process at 320x240 for much faster face recognition
-        small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
+        # Scale comes from config (detection_scale), e.g. 0.5 processes 640x480 at 320x240
+        if small_frame is None:
+            scale = self.detection_scale
+            if scale != 1.0:
+                small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            else:
+                small_frame = frame
+        scale_x = frame.shape[1] / small_frame.shape[1]
+        scale_y = frame.shape[0] / small_frame.shape[0]
         
-        # Convert BGR to RGB (face_recognition uses RGB)
-        rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        # Convert BGR to RGB (face_recognition uses RGB) - only the downscaled frame is converted,
+        # into a buffer reused across frames
+        if self.rgb_buffer is None or self.rgb_buffer.shape != small_frame.shape:
+            self.rgb_buffer = np.empty(small_frame.shape, dtype=np.uint8)
+        rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
         
         # Find face locations and encodings on smaller frame
-        # Use faster model for better performance
-        face_locations = face_recognition.face_locations(rgb_frame, model="hog")  # "hog" is faster than "cnn"
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+        # Detection runs on the Hailo NPU when available, then YuNet (on the BGR frame),
+        # otherwise the faster HOG model on CPU
+        if self.hailo_detector:
+            face_locations = self.hailo_detector.detect(rgb_frame)
+        elif self.yunet_detector is not None:
+            face_locations = self.detect_faces_yunet(small_frame)
+        else:
+            face_locations = face_recognition.face_locations(
+                rgb_frame, number_of_times_to_upsample=self.detection_upsample,
+                model="hog")  # "hog" is faster than "cnn"
+        # Embeddings come from dlib's network (or its ONNX export) so they remain
+        # comparable with the stored authorized encodings
+        if self.face_encoder:
+            face_encodings = self.face_encoder.encode(rgb_frame, face_locations)
+        else:
+            # 5-point landmarks for alignment, single jitter (pinned so every call site matches)
+            face_encodings = face_recognition.face_encodings(rgb_frame, face_locations, num_jitters=1, model="small")
         
         # Scale face locations back to original frame size
-        face_locations = [(top*2, right*2, bottom*2, left*2) for (top, right, bottom, left) in face_locations]
+        if small_frame is not frame:
+            face_locations = [
+                (int(top * scale_y), int(right * scale_x), int(bottom * scale_y), int(left * scale_x))
+                for (top, right, bottom, left) in face_locations
+            ]
         
         recognized = []
         unrecognized = []
@@ -178,82 +396,147 @@ class SecuritySystem:
         if not face_locations:
             return recognized, unrecognized
         
-        for face_encoding, face_location in zip(face_encodings, face_locations):
-            # Compare with known faces
-            if len(self.known_faces) > 0:
-                matches = face_recognition.compare_faces(
-                    self.known_faces, 
-                    face_encoding,
-                    tolerance=self.config.get('face_recognition_tolerance', 0.6)
-                )
-                face_distance = face_recognition.face_distance(self.known_faces, face_encoding)
-                
-                name = "Unknown"
-                best_match_index = None
-                
-                if len(face_distance) > 0:
-                    best_match_index = np.argmin(face_distance)
-                    if matches[best_match_index]:
-                        name = self.known_names[best_match_index]
-                
-                if name == "Unknown":
-                    unrecognized.append((face_location, face_encoding))
-                else:
-                    recognized.append((name, face_location, face_encoding))
+        known_faces_mat, known_faces_ann, known_names = self.known_faces_lookup
+        
+        if len(known_faces_mat) == 0:
+            # No authorized faces loaded, treat all as unauthorized
+            unrecognized.extend(zip(face_locations, face_encodings))
+            return recognized, unrecognized
+        
+        # All faces are matched in one batched call rather than one task per face:
+        # the BLAS/hnswlib call is already multithreaded, and a thread pool on top
+        # would only add dispatch overhead for the few faces in a frame
+        E = np.asarray(face_encodings, dtype=np.float32)
+        E /= np.maximum(np.linalg.norm(E, axis=1, keepdims=True), 1e-12)
+        if known_faces_ann is not None:
+            # Nearest known face from the HNSW index
+            labels, dists = known_faces_ann.knn_query(E, k=1)
+            best_match_indices = labels[:, 0]
+            best_similarities = 1.0 - dists[:, 0]
+        else:
+            # Cosine similarity of every detected face to every known face in one matrix multiply
+            similarities = E @ known_faces_mat.T
+            best_match_indices = similarities.argmax(axis=1)
+            best_similarities = similarities[np.arange(len(E)), best_match_indices]
+        
+        # Single threshold on the nearest face: a Euclidean distance of `tolerance`
+        # between unit vectors is a cosine similarity of 1 - tolerance^2 / 2
+        tolerance = self.face_recognition_tolerance
+        min_similarity = 1.0 - tolerance * tolerance / 2.0
+        for face_encoding, face_location, best_match_index, best_similarity in zip(
+                face_encodings, face_locations, best_match_indices, best_similarities):
+            if best_similarity >= min_similarity:
+                recognized.append((known_names[best_match_index], face_location, face_encoding))
             else:
-                # No authorized faces loaded, treat all as unauthorized
                 unrecognized.append((face_location, face_encoding))
         
         return recognized, unrecognized
     
-    def find_matching_face_id(self, face_encoding, current_time, face_tracking_dict):
-        """Find matching face ID by comparing with tracked faces"""
-        # Compare with all tracked faces to find the best match
-        best_match_id = None
-        best_distance = float('inf')
+    def detect_faces_yunet(self, frame):
+        """
+        Detect faces with the YuNet detector
+        
+        Returns:
+            list of tuples: [(top, right, bottom, left), ...] in frame coordinates
+        """
+        height, width = frame.shape[:2]
+        self.yunet_detector.setInputSize((width, height))
+        _, faces = self.yunet_detector.detect(frame)
+        if faces is None:
+            return []
+        
+        # Each row is [x, y, w, h, landmarks..., score]
+        face_locations = []
+        for x, y, w, h in faces[:, :4]:
+            top = max(0, int(y))
+            left = max(0, int(x))
+            bottom = min(height, int(y + h))
+            right = min(width, int(x + w))
+            face_locations.append((top, right, bottom, left))
+        return face_locations
+    
+    def tracking_candidates(self, current_time, face_tracking_dict):
+        """
+        Stack the encodings of tracked faces that detections can be matched to
         
+        Returns:
+            tuple: (face_ids, N x 128 float32 encodings)
+        """
+        # Match with faces seen within last 10 seconds (allows for brief detection gaps)
+        # This is important for unauthorized faces that need 5 seconds to trigger
+        candidate_ids = []
+        candidate_encodings = []
         for face_id, face_data in face_tracking_dict.items():
-            # Get last seen time (or first_seen if not updated)
             last_seen = face_data.get('last_seen', face_data['first_seen'])
-            time_since_last_seen = current_time - last_seen
-            
-            # Match with faces seen within last 10 seconds (allows for brief detection gaps)
-            # This is important for unauthorized faces that need 5 seconds to trigger
-            if time_since_last_seen < 10:
-                # Calculate face distance
-                if 'encoding' in face_data:
-                    try:
-                        distance = face_recognition.face_distance([face_data['encoding']], face_encoding)[0]
-                        if distance < 0.5 and distance < best_distance:  # 0.5 is a reasonable threshold
-                            best_distance = distance
-                            best_match_id = face_id
-                    except:
-                        pass
-        
-        return best_match_id
+            if current_time - last_seen < 10 and 'encoding' in face_data:
+                candidate_ids.append(face_id)
+                candidate_encodings.append(face_data['encoding'])
+        return candidate_ids, np.asarray(candidate_encodings, dtype=np.float32).reshape(-1, 128)
+    
+    def find_matching_face_id(self, face_encoding, candidates):
+        """Find matching face ID among the tracking candidates (see tracking_candidates)"""
+        candidate_ids, candidate_encodings = candidates
+        if not candidate_ids:
+            return None
+        
+        # Closest candidate within distance 0.5 (a reasonable threshold)
+        best = nearest_within(candidate_encodings, np.asarray(face_encoding, dtype=np.float32), 0.25)
+        return candidate_ids[best] if best >= 0 else None
+    
+    def find_repeat_offenders(self, face_tracking_dict, current_time):
+        """
+        Find tracked unauthorized faces that match a person who triggered an alert within
+        unauthorized_memory_time
+        
+        Returns:
+            set: IDs of tracked faces that are repeat offenders
+        """
+        with self.previously_unauthorized_lock:
+            recent = current_time - self.previously_unauthorized_times < self.unauthorized_memory_time
+            P = self.previously_unauthorized[recent]
+        
+        # Only faces never seen authorized can be repeat offenders
+        tracked = [(face_id, face_data['encoding']) for face_id, face_data in face_tracking_dict.items()
+                   if 'encoding' in face_data and not face_data['ever_authorized']]
+        if not len(P) or not tracked:
+            return set()
+        
+        # Same person if within 0.5 of any remembered face
+        face_ids, tracked_encodings = zip(*tracked)
+        matches = any_within(np.asarray(tracked_encodings, dtype=np.float32), P, 0.25)
+        return {face_id for face_id, match in zip(face_ids, matches) if match}
     
     def update_face_tracking(self, recognized, unrecognized, frame):
-        """Update face tracking and check if alerts should be sent"""
-        current_time = time.time()
+        """
+        Update face tracking and check if alerts should be sent
+        
+        The frame is stored by reference for alert photos, so callers must pass
+        a frame that is not modified afterwards (captured frames are never drawn on,
+        the display draws on its own copy).
+        """
+        current_time = time.monotonic()
         
         with self.face_tracking_lock:
             # Mark all current faces as seen
             current_face_ids = set()
             
+            # Faces detected in this frame are matched against the faces tracked before it,
+            # stacked once for all of them
+            candidates = self.tracking_candidates(current_time, self.face_tracking)
+            
             # Update recognized faces
             for name, location, encoding in recognized:
                 # Try to find matching existing face
-                face_id = self.find_matching_face_id(encoding, current_time, self.face_tracking)
+                face_id = self.find_matching_face_id(encoding, candidates)
                 
                 if face_id is None:
                     # New face detected - create new ID
-                    face_id = len(self.face_tracking)  # Simple ID generation
+                    face_id = next(self._next_face_id)
                     self.face_tracking[face_id] = {
                         'first_seen': current_time,
                         'last_seen': current_time,
                         'ever_authorized': True,  # This face is authorized
                         'location': location,
-                        'frame': frame.copy(),
                         'name': name,
                         'encoding': encoding
                     }
@@ -261,7 +544,8 @@ class SecuritySystem:
                     # Existing face - mark as authorized
                     self.face_tracking[face_id]['ever_authorized'] = True
                     self.face_tracking[face_id]['location'] = location
-                    self.face_tracking[face_id]['frame'] = frame.copy()
+                    # Authorized faces never alert, so don't keep a frame alive for them
+                    self.face_tracking[face_id].pop('frame', None)
                     self.face_tracking[face_id]['encoding'] = encoding
                     self.face_tracking[face_id]['last_seen'] = current_time  # Update last seen time
                 
@@ -270,24 +554,24 @@ class SecuritySystem:
             # Update unrecognized faces
             for location, encoding in unrecognized:
                 # Try to find matching existing face
-                face_id = self.find_matching_face_id(encoding, current_time, self.face_tracking)
+                face_id = self.find_matching_face_id(encoding, candidates)
                 
                 if face_id is None:
                     # New unauthorized face detected - start tracking
-                    face_id = len(self.face_tracking)  # Simple ID generation
+                    face_id = next(self._next_face_id)
                     self.face_tracking[face_id] = {
                         'first_seen': current_time,
                         'last_seen': current_time,
                         'ever_authorized': False,
                         'location': location,
-                        'frame': frame.copy(),
+                        'frame': frame,
                         'name': None,
                         'encoding': encoding
                     }
                 else:
                     # Existing face - update location and frame
                     self.face_tracking[face_id]['location'] = location
-                    self.face_tracking[face_id]['frame'] = frame.copy()
+                    self.face_tracking[face_id]['frame'] = frame
                     self.face_tracking[face_id]['encoding'] = encoding
                     self.face_tracking[face_id]['last_seen'] = current_time  # Update last seen time
                     # Don't change ever_authorized if it was True before
@@ -296,23 +580,14 @@ class SecuritySystem:
             
             # Check for faces that should trigger alerts
             faces_to_remove = []
+            repeat_offender_ids = self.find_repeat_offenders(self.face_tracking, current_time)
             for face_id, face_data in self.face_tracking.items():
                 elapsed = current_time - face_data['first_seen']
                 
-                # Check if this is a repeat offender (previously detected unauthorized)
-                is_repeat_offender = False
-                if 'encoding' in face_data:
-                    with self.previously_unauthorized_lock:
-                        for prev_encoding, prev_time in self.previously_unauthorized:
-                            # Check if face matches and memory hasn't expired
-                            if current_time - prev_time < self.unauthorized_memory_time:
-                                try:
-                                    distance = face_recognition.face_distance([prev_encoding], face_data['encoding'])[0]
-                                    if distance < 0.5:  # Same person
-                                        is_repeat_offender = True
-                                        break
-                                except:
-                                    pass
+                # Check if this is a repeat offender (previously detected unauthorized);
+                # cached on the face for the display until the next scan
+                is_repeat_offender = face_id in repeat_offender_ids
+                face_data['is_repeat'] = is_repeat_offender
                 
                 # Determine delay: shorter for repeat offenders
                 required_delay = self.repeat_offender_delay if is_repeat_offender else self.unauthorized_delay
@@ -334,7 +609,7 @@ class SecuritySystem:
                         face_encoding_hash = hash(tuple(encoding[:10]))  # Use first 10 values for hash
                         
                         with self.face_alert_times_lock:
-                            last_alert_time = self.face_alert_times.get(face_encoding_hash, 0)
+                            last_alert_time = self.face_alert_times.get(face_encoding_hash, float('-inf'))
                             time_since_last_alert = current_time - last_alert_time
                             
                             if time_since_last_alert < self.same_person_alert_cooldown:
@@ -343,7 +618,7 @@ class SecuritySystem:
                                 print(f"[DEBUG] Same person alert cooldown: {cooldown_remaining:.0f}s remaining (last alert {time_since_last_alert:.0f}s ago)")
                     
                     # Also check global cooldown to avoid spamming
-                    last_alert = self.last_detection_time.get('unauthorized', 0)
+                    last_alert = self.last_detection_time.get('unauthorized', float('-inf'))
                     global_cooldown_ok = current_time - last_alert >= self.detection_cooldown
                     
                     if can_send_alert and global_cooldown_ok:
@@ -364,7 +639,10 @@ class SecuritySystem:
                         # Add to previously unauthorized list if not already there
                         if 'encoding' in face_data and not is_repeat_offender:
                             with self.previously_unauthorized_lock:
-                                self.previously_unauthorized.append((face_data['encoding'].copy(), current_time))
+                                slot = self.previously_unauthorized_next
+                                self.previously_unauthorized[slot] = face_data['encoding']
+                                self.previously_unauthorized_times[slot] = current_time
+                                self.previously_unauthorized_next = (slot + 1) % len(self.previously_unauthorized)
                         
                         faces_to_remove.append(face_id)
                     elif not global_cooldown_ok:
@@ -374,44 +652,19 @@ class SecuritySystem:
                 elif face_data['ever_authorized'] and elapsed > 10:
                     faces_to_remove.append(face_id)
             
-            # Remove old/processed faces
-            for face_id in faces_to_remove:
-                if face_id in self.face_tracking:
-                    del self.face_tracking[face_id]
-            
-            # Remove faces that are no longer visible (not in current frame)
-            # Keep them for a bit in case they come back
-            # For unauthorized faces, keep tracking longer to allow the 5-second delay
-            faces_to_remove_old = []
-            for face_id in self.face_tracking:
-                if face_id not in current_face_ids:
-                    face_data = self.face_tracking[face_id]
-                    # Get last time this face was seen (update it each time we see it)
-                    last_seen = face_data.get('last_seen', face_data['first_seen'])
-                    time_since_last_seen = current_time - last_seen
-                    
-                    # For unauthorized faces, keep tracking longer (at least 10 seconds)
-                    # For authorized faces, can remove sooner
-                    if not face_data.get('ever_authorized', False):
-                        # Unauthorized: keep for at least 10 seconds after last seen
-                        # This ensures we can track through brief detection gaps
-                        if time_since_last_seen > 10:
-                            faces_to_remove_old.append(face_id)
-                    else:
-                        # Authorized: can remove after 3 seconds
-                        if time_since_last_seen > 3:
-                            faces_to_remove_old.append(face_id)
-            
-            for face_id in faces_to_remove_old:
-                if face_id in self.face_tracking:
-                    del self.face_tracking[face_id]
-            
-            # Clean up old entries from previously_unauthorized list (older than memory time)
-            with self.previously_unauthorized_lock:
-                self.previously_unauthorized = [
-                    (encoding, prev_time) for encoding, prev_time in self.previously_unauthorized
-                    if current_time - prev_time < self.unauthorized_memory_time
-                ]
+            # Remove old/processed faces and faces that are no longer visible in one sweep
+            # Faces not in the current frame are kept for a bit in case they come back:
+            # unauthorized faces for 10 seconds after last seen (to track through brief
+            # detection gaps and allow the alert delay), authorized faces for 3 seconds
+            removed = set(faces_to_remove)
+            self.face_tracking = {
+                face_id: face_data for face_id, face_data in self.face_tracking.items()
+                if face_id not in removed and (
+                    face_id in current_face_ids or
+                    current_time - face_data.get('last_seen', face_data['first_seen'])
+                    <= (3 if face_data.get('ever_authorized', False) else 10)
+                )
+            }
             
             # Clean up old face alert times (older than cooldown period)
             with self.face_alert_times_lock:
@@ -419,6 +672,14 @@ class SecuritySystem:
                     face_hash: alert_time for face_hash, alert_time in self.face_alert_times.items()
                     if current_time - alert_time < self.same_person_alert_cooldown
                 }
+            
+            # Publish what the display needs about unauthorized faces as one immutable
+            # snapshot, so the display reads it without taking face_tracking_lock
+            self.tracking_snapshot = tuple(
+                (face_data['first_seen'], face_data['location'], face_data.get('is_repeat', False))
+                for face_data in self.face_tracking.values()
+                if not face_data['ever_authorized']
+            )
     
     def draw_face_box(self, frame, location, name, color=(0, 255, 0)):
         """Draw a box around a face with the name"""
@@ -434,32 +695,58 @@ class SecuritySystem:
         font = cv2.FONT_HERSHEY_DUPLEX
         cv2.putText(frame, name, (left + 6, bottom - 6), font, 0.6, (255, 255, 255), 1)
     
+    @staticmethod
+    def motion_thumbnail(frame):
+        """Grayscale thumbnail of a BGR frame, about 160 pixels wide"""
+        # Taken by striding, so only every Nth row of the full frame is read;
+        # grayscale conversion then only touches the thumbnail
+        step = max(1, frame.shape[1] // 160)
+        return cv2.cvtColor(np.ascontiguousarray(frame[::step, ::step]), cv2.COLOR_BGR2GRAY)
+    
+    def scene_unchanged_since_empty_scan(self, thumbnail, frame, current_time):
+        """
+        Check whether the scene still looks like the last scan, when that scan found no faces
+        
+        A face cannot appear without pixels changing, so the scan can be skipped. Compared
+        with that scan rather than the previous frame, so slow changes still add up; a full
+        scan still runs every empty_scan_max_age seconds in case a small change was a face
+        
+        Returns:
+            bool: True if fewer pixels changed than motion_threshold and no faces are tracked
+        """
+        if (self.empty_scan_thumbnail is None or self.face_tracking
+                or current_time - self.empty_scan_time >= self.empty_scan_max_age):
+            return False
+        
+        scale = (frame.shape[0] * frame.shape[1]) / (thumbnail.shape[0] * thumbnail.shape[1])
+        return count_changed_pixels(thumbnail, self.empty_scan_thumbnail, 30) * scale <= self.motion_threshold
+    
     def detect_motion(self, current_frame):
-        """Detect motion between frames using frame differencing"""
+        """
+        Detect motion by differencing a ~160 pixel wide grayscale thumbnail
+        against a running background
+        
+        Returns:
+            bool: True if the number of changed pixels, scaled back to the full
+            frame, exceeds motion_threshold
+        """
         if not self.motion_detection_enabled:
             self.motion_detected = True
             return True  # If motion detection disabled, always return True
         
+        gray_small = self.motion_thumbnail(current_frame)
+        
         if self.previous_frame is None:
-            self.previous_frame = current_frame.copy()
+            self.previous_frame = gray_small
             self.motion_detected = True
             return True  # First frame, assume motion to start processing
         
-        # Convert to grayscale for comparison
-        gray_current = cv2.cvtColor(current_frame, cv2.COLOR_BGR2GRAY)
-        gray_previous = cv2.cvtColor(self.previous_frame, cv2.COLOR_BGR2GRAY)
-        
-        # Calculate frame difference
-        frame_diff = cv2.absdiff(gray_current, gray_previous)
+        # Count changed pixels and scale to the full frame so motion_threshold keeps its meaning
+        scale = (current_frame.shape[0] * current_frame.shape[1]) / (gray_small.shape[0] * gray_small.shape[1])
+        motion_pixels = count_changed_pixels(gray_small, self.previous_frame, 30) * scale
         
-        # Apply threshold
-        _, thresh = cv2.threshold(frame_diff, 30, 255, cv2.THRESH_BINARY)
-        
-        # Count non-zero pixels (motion pixels)
-        motion_pixels = cv2.countNonZero(thresh)
-        
-        # Update previous frame
-        self.previous_frame = current_frame.copy()
+        # Blend into the background so sensor noise and lighting drift don't count as motion
+        self.previous_frame = cv2.addWeighted(self.previous_frame, 0.5, gray_small, 0.5, 0)
         
         # Check if motion exceeds threshold
         motion_detected = motion_pixels > self.motion_threshold
@@ -467,31 +754,63 @@ class SecuritySystem:
         
         return motion_detected
     
+    def encode_jpeg(self, frame, quality=85):
+        """
+        Encode a BGR frame as JPEG
+        
+        Uses simplejpeg (libjpeg-turbo with fast DCT) when available,
+        otherwise OpenCV's encoder.
+        
+        Returns:
+            bytes: Encoded JPEG, or None if encoding failed
+        """
+        if SIMPLEJPEG_AVAILABLE:
+            return simplejpeg.encode_jpeg(frame, quality=quality, colorspace='BGR', fastdct=True)
+        
+        success, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality,
+                                                     cv2.IMWRITE_JPEG_OPTIMIZE, 0])
+        return jpeg.tobytes() if success else None
+    
     def send_unauthorized_alert(self, frame, face_location, face_id, alert_type="UNAUTHORIZED"):
         """Send alert for unauthorized person after delay"""
         print(f"⚠️  {alert_type} PERSON DETECTED! (Face ID: {face_id})")
         
+        # Create timestamp
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Announce, save the photo and queue the email on the alert thread
+        # Never block the processing thread - drop the alert if too many are pending
+        if not self.alert_slots.acquire(blocking=False):
+            print("  Alert queue full, skipping photo and email")
+            return
+        future = self.alert_executor.submit(self.save_and_send_alert, frame, face_location, timestamp, alert_type)
+        future.add_done_callback(lambda _: self.alert_slots.release())
+    
+    def save_and_send_alert(self, frame, face_location, timestamp, alert_type):
+        """Save the alert photo and queue the alert email (runs on the alert thread)"""
         # Voice announcement
         if self.voice_system:
             self.voice_system.speak_unauthorized()
         
-        # Create timestamp
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
         # Save photo
         filename = f"unauthorized_{timestamp}.jpg"
         filepath = self.unauthorized_dir / filename
         
-        # Draw box on frame before saving
+        # Draw box on a copy before saving - the tracked frame is shared with the
+        # processing thread (face trackers read the same region)
         frame_copy = frame.copy()
         top, right, bottom, left = face_location
         cv2.rectangle(frame_copy, (left, top), (right, bottom), (0, 0, 255), 3)
         cv2.putText(frame_copy, alert_type, (left, top - 10),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
         
-        # Save photo
+        # Encode once, the same JPEG bytes are saved and attached to the email
         try:
-            cv2.imwrite(str(filepath), frame_copy)
+            jpeg_bytes = self.encode_jpeg(frame_copy, self.alert_jpeg_quality)
+            if jpeg_bytes is None:
+                print("  ERROR: Could not encode photo")
+                return  # Don't send email if photo couldn't be encoded
+            filepath.write_bytes(jpeg_bytes)
             if filepath.exists():
                 print(f"  Photo saved: {filepath}")
                 print(f"  Photo absolute path: {filepath.absolute()}")
@@ -511,29 +830,95 @@ class SecuritySystem:
             print(f"  Attempting to send email with photo: {filepath}")
             # Convert Path to string for email sender
             filepath_str = str(filepath.absolute())
-            self.email_sender.send_alert(filepath_str, timestamp)
-            print("  ✓ Alert email sent successfully")
+            self.email_sender.send_alert(filepath_str, timestamp, jpeg_bytes)
+            print("  ✓ Alert email queued")
         except Exception as e:
             print(f"  ✗ Error sending email: {e}")
             import traceback
             traceback.print_exc()
     
+    def capture_frames_thread(self):
+        """Background thread that keeps the newest camera frame ready for the main loop"""
+        while self.running:
+            try:
+                # Frames already arrive in OpenCV's BGR order (see setup_camera)
+                if self.lores_size:
+                    # Both streams from the same request, so they show the same moment
+                    request = self.camera.capture_request()
+                    try:
+                        frame = (request.make_array("main"), request.make_array("lores"))
+                    finally:
+                        request.release()
+                else:
+                    frame = (self.camera.capture_array(), None)
+            except Exception as e:
+                print(f"Error in capture thread: {e}")
+                time.sleep(0.1)
+                continue
+            
+            # Replace a frame the main loop has not picked up yet
+            self.capture_slot.put(frame)
+    
+    @staticmethod
+    def create_face_tracker():
+        """Create a fast correlation filter tracker (MOSSE, else KCF), or None if unavailable"""
+        for factory in (getattr(getattr(cv2, 'legacy', None), 'TrackerMOSSE_create', None),
+                        getattr(cv2, 'TrackerKCF_create', None)):
+            if factory is not None:
+                return factory()
+        return None
+    
+    def seed_face_trackers(self, frame, recognized, unrecognized):
+        """Start a tracker on each detected face (recognized: [(name, location)], unrecognized: [location])"""
+        trackers = []
+        faces = list(recognized) + [(None, location) for location in unrecognized]
+        for name, (top, right, bottom, left) in faces:
+            tracker = self.create_face_tracker()
+            if tracker is None:
+                # No tracker implementation in this OpenCV build
+                self.face_tracking_between_scans = False
+                break
+            tracker.init(frame, (left, top, right - left, bottom - top))
+            trackers.append((tracker, name))
+        self.face_trackers = trackers
+    
+    def update_face_trackers(self, frame):
+        """
+        Advance the face trackers to a new frame, dropping faces that were lost
+        
+        Returns:
+            tuple: (recognized, unrecognized) in the same format as latest_results
+        """
+        recognized = []
+        unrecognized = []
+        trackers = []
+        for tracker, name in self.face_trackers:
+            ok, (x, y, w, h) = tracker.update(frame)
+            if not ok:
+                continue
+            location = (int(y), int(x + w), int(y + h), int(x))
+            if name is None:
+                unrecognized.append(location)
+            else:
+                recognized.append((name, location))
+            trackers.append((tracker, name))
+        self.face_trackers = trackers
+        return tuple(recognized), tuple(unrecognized)
+    
     def process_frames_thread(self):
         """Background thread for processing face recognition"""
-        process_every_n_frames = self.config.get('process_every_n_frames', 2)
         frame_count = 0
         motion_check_counter = 0
-        last_debug_time = time.time()
+        last_debug_time = time.monotonic()
         
         while self.running:
             try:
-                # Get frame from queue (non-blocking with timeout)
-                try:
-                    frame_data = self.frame_queue.get(timeout=0.1)
-                    frame, original_frame = frame_data
-                    frame_count += 1
-                except:
+                # Get the newest frame (waits briefly so self.running is rechecked)
+                item = self.frame_slot.get(timeout=0.1)
+                if item is None:
                     continue
+                original_frame, small_frame = item
+                frame_count += 1
                 
                 # Check for motion periodically (lightweight check)
                 if self.motion_detection_enabled:
@@ -550,19 +935,24 @@ class SecuritySystem:
                     scan_interval = self.scan_interval_motion  # Use motion interval if detection disabled
                 
                 # Time-based throttling to prevent overload
-                current_time = time.time()
+                current_time = time.monotonic()
                 time_since_last_process = current_time - self.last_processing_time
                 
                 # Process face recognition at adaptive interval AND minimum time interval
                 if frame_count % scan_interval == 0 and time_since_last_process >= self.min_processing_interval:
                     self.last_processing_time = current_time
                     
+                    # Nobody was found last time and the scene has not changed since: skip detection
+                    thumbnail = self.motion_thumbnail(original_frame) if self.motion_detection_enabled else None
+                    if thumbnail is not None and self.scene_unchanged_since_empty_scan(thumbnail, original_frame, current_time):
+                        continue
+                    
                     # Debug output every 5 seconds
                     if current_time - last_debug_time > 5:
                         print(f"[DEBUG] Processing frame {frame_count}, scan_interval={scan_interval}, motion={self.motion_detected}, known_faces={len(self.known_faces)}")
                         last_debug_time = current_time
                     
-                    recognized, unrecognized = self.recognize_face(original_frame)
+                    recognized, unrecognized = self.recognize_face(original_frame, small_frame)
                     
                     # Debug if faces found
                     if recognized or unrecognized:
@@ -573,14 +963,21 @@ class SecuritySystem:
                         print(f"[DEBUG] Processing {len(unrecognized)} unrecognized face(s)...")
                     self.update_face_tracking(recognized, unrecognized, original_frame)
                     
+                    # Later scans compare against this one while it is empty
+                    self.empty_scan_thumbnail = None if self.face_tracking else thumbnail
+                    self.empty_scan_time = current_time
+                    
                     # Convert back to old format for display (without encodings)
-                    recognized_display = [(name, loc) for name, loc, _ in recognized]
-                    unrecognized_display = [loc for loc, _ in unrecognized]
+                    recognized_display = tuple((name, loc) for name, loc, _ in recognized)
+                    unrecognized_display = tuple(loc for loc, _ in unrecognized)
+                    
+                    # Publish results with a single reference swap (the display never sees
+                    # a half-updated pair and neither thread waits on a lock)
+                    self.latest_results = {'recognized': recognized_display, 'unrecognized': unrecognized_display}
                     
-                    # Update results thread-safely
-                    with self.results_lock:
-                        self.latest_results['recognized'] = recognized_display
-                        self.latest_results['unrecognized'] = unrecognized_display
+                    # Re-seed trackers from the fresh detections
+                    if self.face_tracking_between_scans:
+                        self.seed_face_trackers(original_frame, recognized_display, unrecognized_display)
                     
                     # Voice announcements for authorized persons
                     if self.voice_system and recognized:
@@ -588,10 +985,118 @@ class SecuritySystem:
                             if name != "Unknown":
                                 self.voice_system.speak_authorized(name)
                 
+                elif self.face_trackers:
+                    # Between detections, follow the last detected faces so boxes keep moving
+                    recognized_display, unrecognized_display = self.update_face_trackers(original_frame)
+                    self.latest_results = {'recognized': recognized_display, 'unrecognized': unrecognized_display}
+                
             except Exception as e:
                 print(f"Error in processing thread: {e}")
                 continue
     
+    def render_display_frame(self, frame_bgr, display_size, status_text):
+        """Resize a captured frame for display and draw face boxes and status overlays on it"""
+        # Resize frame for display (smaller = faster) into a buffer reused across frames;
+        # only this thread touches it, and imshow copies it. The captured frame is shared
+        # with the processing thread, so at display size it is copied before drawing
+        buffer_shape = (display_size[1], display_size[0]) + frame_bgr.shape[2:]
+        if self.display_buffer is None or self.display_buffer.shape != buffer_shape:
+            self.display_buffer = np.empty(buffer_shape, dtype=np.uint8)
+        display_frame = self.display_buffer
+        if display_size == (frame_bgr.shape[1], frame_bgr.shape[0]):
+            np.copyto(display_frame, frame_bgr)
+        else:
+            cv2.resize(frame_bgr, display_size, dst=display_frame)
+        
+        # Get latest recognition results (published by reference swap, no lock needed)
+        results = self.latest_results
+        recognized = results['recognized']
+        unrecognized = results['unrecognized']
+        
+        # Get face tracking info for countdown display from the last published snapshot
+        # (repeat offender flags are as of the last scan)
+        current_time = time.monotonic()
+        track_infos = []
+        for first_seen, location, is_repeat in self.tracking_snapshot:
+            required_delay = self.repeat_offender_delay if is_repeat else self.unauthorized_delay
+            track_infos.append({
+                'remaining': max(0, required_delay - (current_time - first_seen)),
+                'location': location,
+                'is_repeat': is_repeat
+            })
+        
+        # Face locations are in frame coordinates; scale them if the frame was resized
+        # (factors computed once per frame)
+        if display_frame.shape[:2] != frame_bgr.shape[:2]:
+            scale_x = display_size[0] / frame_bgr.shape[1]
+            scale_y = display_size[1] / frame_bgr.shape[0]
+            
+            def to_display(location):
+                top, right, bottom, left = location
+                return (int(top * scale_y), int(right * scale_x),
+                        int(bottom * scale_y), int(left * scale_x))
+        else:
+            def to_display(location):
+                return location
+        
+        # Draw recognized faces (green)
+        for name, location in recognized:
+            self.draw_face_box(display_frame, to_display(location), name, (0, 255, 0))
+        
+        # Centers of tracked faces and unrecognized faces, both in frame coordinates
+        track_centers = np.array([((left + right) // 2, (top + bottom) // 2)
+                                  for top, right, bottom, left in (info['location'] for info in track_infos)],
+                                 dtype=np.int32).reshape(-1, 2)
+        face_centers = np.array([((left + right) // 2, (top + bottom) // 2)
+                                 for top, right, bottom, left in unrecognized],
+                                dtype=np.int32).reshape(-1, 2)
+        
+        # Find matching tracking info for every face at once (approximate match by
+        # location): the first tracked face whose center is within 50 pixels on both axes
+        matches = np.full(len(unrecognized), -1)
+        if len(track_infos):
+            close = (np.abs(face_centers[:, None, :] - track_centers[None, :, :]) < 50).all(axis=2)
+            matches = np.where(close.any(axis=1), close.argmax(axis=1), -1)
+        
+        # Draw unrecognized faces (red) with countdown
+        for location, match in zip(unrecognized, matches):
+            scaled_location = to_display(location)
+            
+            countdown_text = "UNAUTHORIZED"
+            if match >= 0:
+                info = track_infos[match]
+                remaining = info['remaining']
+                is_repeat = info.get('is_repeat', False)
+                prefix = "REPEAT OFFENDER" if is_repeat else "UNAUTHORIZED"
+                if remaining > 0:
+                    countdown_text = f"{prefix} ({remaining:.1f}s)"
+                else:
+                    countdown_text = "ALERT SENT!"
+            
+            self.draw_face_box(display_frame, scaled_location, countdown_text, (0, 0, 255))
+        
+        # Add status text
+        cv2.putText(display_frame, status_text, (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        
+        # Show motion detection status
+        if self.motion_detection_enabled:
+            if self.motion_detected:
+                motion_status = "MOTION - Fast Scan"
+                motion_color = (0, 255, 0)  # Green
+            else:
+                motion_status = "No Motion - Slow Scan"
+                motion_color = (0, 165, 255)  # Orange
+            cv2.putText(display_frame, motion_status, (10, 60),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, motion_color, 2)
+        
+        # Show detection status
+        if len(unrecognized) > 0:
+            cv2.putText(display_frame, "UNAUTHORIZED DETECTED!", (10, 90),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        
+        return display_frame
+    
     def run(self):
         """Main security system loop"""
         print("\n" + "=" * 60)
@@ -607,160 +1112,53 @@ class SecuritySystem:
         self.processing_thread = threading.Thread(target=self.process_frames_thread, daemon=True)
         self.processing_thread.start()
         
+        # Start capture thread so capturing overlaps with drawing and display
+        self.capture_thread = threading.Thread(target=self.capture_frames_thread, daemon=True)
+        self.capture_thread.start()
+        
+        # Pick up added or removed faces without stalling the display loop (re-encoding
+        # new images can take seconds)
+        self.reload_thread = threading.Thread(target=self.reload_faces_thread, daemon=True)
+        self.reload_thread.start()
+        
         frame_count = 0
-        start_time = time.time()
+        start_time = time.monotonic()
         
-        # Get display size for resizing
-        display_size = tuple(self.config.get('display_size', [640, 480]))
+        # Settings used every frame, bound once as locals
+        display_enabled = self.display_enabled
+        display_size = self.display_size
+        # pollKey (OpenCV 4.5+) handles window events and keys without waitKey's 1 ms wait
+        poll_key = getattr(cv2, 'pollKey', None) or (lambda: cv2.waitKey(1))
         
         try:
             while True:
-                # Capture frame (this is fast, doesn't block)
-                frame = self.camera.capture_array()
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)  # Convert to BGR for OpenCV
-                
-                # Resize frame for display (smaller = faster)
-                display_frame = cv2.resize(frame_bgr, display_size) if display_size != tuple(frame_bgr.shape[:2][::-1]) else frame_bgr.copy()
-                
-                # Add frame to processing queue (non-blocking, drops old frames if queue full)
-                # Only add if queue has space to prevent backup
-                if not self.frame_queue.full():
-                    try:
-                        self.frame_queue.put_nowait((display_frame.copy(), frame_bgr.copy()))
-                    except:
-                        pass  # Queue full, skip this frame
-                else:
-                    # Queue full, remove oldest and add new (don't block)
-                    try:
-                        self.frame_queue.get_nowait()
-                        self.frame_queue.put_nowait((display_frame.copy(), frame_bgr.copy()))
-                    except:
-                        pass  # Skip if can't add
-                
-                # Get latest recognition results (thread-safe)
-                with self.results_lock:
-                    recognized = self.latest_results['recognized'].copy()
-                    unrecognized = self.latest_results['unrecognized'].copy()
-                
-                # Get face tracking info for countdown display
-                current_time = time.time()
-                with self.face_tracking_lock:
-                    tracking_info = {}
-                    for face_id, face_data in self.face_tracking.items():
-                        if not face_data['ever_authorized']:
-                            elapsed = current_time - face_data['first_seen']
-                            
-                            # Check if repeat offender
-                            is_repeat = False
-                            if 'encoding' in face_data:
-                                with self.previously_unauthorized_lock:
-                                    for prev_encoding, prev_time in self.previously_unauthorized:
-                                        if current_time - prev_time < self.unauthorized_memory_time:
-                                            try:
-                                                distance = face_recognition.face_distance([prev_encoding], face_data['encoding'])[0]
-                                                if distance < 0.5:
-                                                    is_repeat = True
-                                                    break
-                                            except:
-                                                pass
-                            
-                            required_delay = self.repeat_offender_delay if is_repeat else self.unauthorized_delay
-                            remaining = max(0, required_delay - elapsed)
-                            tracking_info[face_id] = {
-                                'remaining': remaining,
-                                'location': face_data['location'],
-                                'is_repeat': is_repeat
-                            }
-                
-                # Draw recognized faces (green)
-                for name, location in recognized:
-                    # Scale location if frame was resized
-                    if display_frame.shape[:2] != frame_bgr.shape[:2]:
-                        scale_x = display_size[0] / frame_bgr.shape[1]
-                        scale_y = display_size[1] / frame_bgr.shape[0]
-                        top, right, bottom, left = location
-                        location_scaled = (
-                            int(top * scale_y), int(right * scale_x),
-                            int(bottom * scale_y), int(left * scale_x)
-                        )
-                        self.draw_face_box(display_frame, location_scaled, name, (0, 255, 0))
-                    else:
-                        self.draw_face_box(display_frame, location, name, (0, 255, 0))
-                
-                # Draw unrecognized faces (red) with countdown
-                for location in unrecognized:
-                    # Scale location if frame was resized
-                    if display_frame.shape[:2] != frame_bgr.shape[:2]:
-                        scale_x = display_size[0] / frame_bgr.shape[1]
-                        scale_y = display_size[1] / frame_bgr.shape[0]
-                        top, right, bottom, left = location
-                        location_scaled = (
-                            int(top * scale_y), int(right * scale_x),
-                            int(bottom * scale_y), int(left * scale_x)
-                        )
-                        scaled_location = location_scaled
-                    else:
-                        scaled_location = location
-                    
-                    # Find matching tracking info (approximate match by location)
-                    top, right, bottom, left = scaled_location
-                    center_x = (left + right) // 2
-                    center_y = (top + bottom) // 2
-                    
-                    # Find closest tracking entry
-                    countdown_text = "UNAUTHORIZED"
-                    for face_id, info in tracking_info.items():
-                        track_top, track_right, track_bottom, track_left = info['location']
-                        track_center_x = (track_left + track_right) // 2
-                        track_center_y = (track_top + track_bottom) // 2
-                        
-                        # If locations are close (within 50 pixels), show countdown
-                        if abs(center_x - track_center_x) < 50 and abs(center_y - track_center_y) < 50:
-                            remaining = info['remaining']
-                            is_repeat = info.get('is_repeat', False)
-                            prefix = "REPEAT OFFENDER" if is_repeat else "UNAUTHORIZED"
-                            if remaining > 0:
-                                countdown_text = f"{prefix} ({remaining:.1f}s)"
-                            else:
-                                countdown_text = "ALERT SENT!"
-                            break
-                    
-                    self.draw_face_box(display_frame, scaled_location, countdown_text, (0, 0, 255))
-                
-                # Add status text
-                elapsed = time.time() - start_time
-                fps = frame_count / max(0.1, elapsed)
-                status_text = f"Authorized: {len(self.known_faces)} | Frame: {frame_count} | FPS: {fps:.1f}"
-                cv2.putText(display_frame, status_text, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                
-                # Show motion detection status
-                if self.motion_detection_enabled:
-                    if self.motion_detected:
-                        motion_status = "MOTION - Fast Scan"
-                        motion_color = (0, 255, 0)  # Green
-                    else:
-                        motion_status = "No Motion - Slow Scan"
-                        motion_color = (0, 165, 255)  # Orange
-                    cv2.putText(display_frame, motion_status, (10, 60),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, motion_color, 2)
+                # Take the newest frame from the capture thread
+                item = self.capture_slot.get(timeout=1.0)
+                if item is None:
+                    continue
+                frame_bgr, small_bgr = item
                 
-                # Show detection status
-                if len(unrecognized) > 0:
-                    cv2.putText(display_frame, "UNAUTHORIZED DETECTED!", (10, 90),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                # Hand the frame to the processing thread (never blocks; replaces a frame it
+                # has not picked up yet so it always works on the newest one). Captured frames
+                # are freshly allocated and never written to, so no copy is needed. The detection
+                # frame is not derived from the display frame: it comes from the lores stream,
+                # or is resized by recognize_face only on the frames that are actually scanned
+                self.frame_slot.put((frame_bgr, small_bgr))
                 
-                # Display frame immediately (smooth display)
-                if self.config.get('display', True):
+                # Draw and show the display frame (skipped entirely when running headless).
+                # This loop is already the display thread - capture and recognition run on
+                # their own threads - and HighGUI windows must stay on the thread that
+                # created them, so drawing and imshow are not split further
+                if display_enabled:
+                    elapsed = time.monotonic() - start_time
+                    fps = frame_count / max(0.1, elapsed)
+                    status_text = f"Authorized: {len(self.known_faces)} | Frame: {frame_count} | FPS: {fps:.1f}"
+                    display_frame = self.render_display_frame(frame_bgr, display_size, status_text)
                     cv2.imshow("Security System", display_frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    if poll_key() & 0xFF == ord('q'):
                         break
                 
                 frame_count += 1
-                
-                # Reload faces periodically (in case new faces are added)
-                if frame_count % 300 == 0:  # Every 300 frames
-                    self.load_authorized_faces()
         
         except KeyboardInterrupt:
             print("\n\nShutting down security system...")
@@ -778,9 +1176,29 @@ class SecuritySystem:
         if self.processing_thread and self.processing_thread.is_alive():
             self.processing_thread.join(timeout=2.0)
         
-        # Clean up camera
+        # Wait for capture thread before stopping the camera it reads from
+        if self.capture_thread and self.capture_thread.is_alive():
+            self.capture_thread.join(timeout=2.0)
+        
+        # Clean up camera, releasing its frame buffers
         if self.camera:
             self.camera.stop()
+            self.camera.close()
+            self.camera = None
+        
+        # Finish saving pending alert photos, then send any queued alerts before exiting
+        self.alert_executor.shutdown(wait=True)
+        self.email_sender.close()
+        
+        if self.hailo_detector:
+            self.hailo_detector.close()
+            self.hailo_detector = None
+        if isinstance(self.face_encoder, HailoFaceEncoder):
+            self.face_encoder.close()
+            self.face_encoder = None
+        if self.hailo_device:
+            self.hailo_device.release()
+            self.hailo_device = None
         
         cv2.destroyAllWindows()
         print("Security system stopped.")
@@ -16,8 +16,9 @@ print("Press Ctrl+C to stop")
 camera = Picamera2()
 
 # Configure camera
+# picamera2's RGB888 is stored as B, G, R - already in OpenCV's order
 camera_config = camera.create_preview_configuration(
-    main={"size": (1280, 720)}
+    main={"size": (1280, 720), "format": "RGB888"}
 )
 camera.configure(camera_config)
 camera.start()
@@ -31,8 +32,7 @@ try:
     # Take 3 test photos
     for i in range(1, 4):
         print(f"Taking photo {i}...")
-        frame = camera.capture_array()
-        frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        frame_bgr = camera.capture_array()
         
         # Add text
         cv2.putText(frame_bgr, f"Camera Test Photo {i}", (10, 30),
@@ -5,10 +5,26 @@ Quick diagnostic to see if face recognition is working
 """
 
 import cv2
+import numpy as np
 import face_recognition
 import sys
+import threading
 from pathlib import Path
 import config as cfg
+import face_index
+from frame_slot import LatestFrameSlot
+
+# Face detection and recognition run on every Nth frame; trackers move the boxes in between
+DETECT_EVERY_N_FRAMES = 5
+
+
+def create_face_tracker():
+    """Create a fast correlation filter tracker (MOSSE, else KCF), or None if unavailable"""
+    for factory in (getattr(getattr(cv2, 'legacy', None), 'TrackerMOSSE_create', None),
+                    getattr(cv2, 'TrackerKCF_create', None)):
+        if factory is not None:
+            return factory()
+    return None
 
 def test_face_recognition():
     """Test face recognition with live camera"""
@@ -22,8 +38,6 @@ def test_face_recognition():
     
     # Load authorized faces
     print("\n1. Loading authorized faces...")
-    known_faces = []
-    known_names = []
     
     if not faces_dir.exists():
         print(f"❌ Faces directory not found: {faces_dir}")
@@ -38,29 +52,31 @@ def test_face_recognition():
         print("   Add faces first with: python3 manage_faces.py capture 'Name'")
         return False
     
-    for image_file in face_files:
-        try:
-            image = face_recognition.load_image_file(str(image_file))
-            encodings = face_recognition.face_encodings(image)
-            if encodings:
-                known_faces.append(encodings[0])
-                known_names.append(image_file.stem)
-                print(f"  ✓ Loaded: {image_file.stem}")
-            else:
-                print(f"  ⚠️  No face found in {image_file.name}")
-        except Exception as e:
-            print(f"  ❌ Error loading {image_file.name}: {e}")
+    # Same encodings cache as security_system.py: only new or changed images are encoded
+    known_faces, known_names = face_index.load_cached_encodings(faces_dir)
+    for name in known_names:
+        print(f"  ✓ Loaded: {name}")
     
-    if not known_faces:
+    if not len(known_faces):
         print("❌ No valid faces loaded!")
         return False
     
     print(f"\n✓ Loaded {len(known_faces)} authorized face(s)")
+    tolerance = config.get('face_recognition_tolerance', 0.6)
+    
+    # Match the way security_system.py does: unit-length encodings, so the distance
+    # check becomes one dot product per known face (|a - b|^2 = 2 - 2 a.b)
+    known_faces_mat = np.array(known_faces, dtype=np.float32)  # Copy, normalized in place
+    known_faces_mat /= np.linalg.norm(known_faces_mat, axis=1, keepdims=True)
+    min_similarity = 1.0 - tolerance * tolerance / 2.0
     
     # Open camera
     print("\n2. Opening camera...")
     camera_type = config.get('camera_type', 'pi_camera')
     camera_index = config.get('usb_camera_index', 0)
+    frame_width, frame_height = 640, 480
+    # Detection runs at half size, the same scale as small_frame below
+    lores_width, lores_height = frame_width // 2, frame_height // 2
     
     if camera_type == 'usb_webcam':
         print(f"  Using USB webcam (index {camera_index})")
@@ -68,13 +84,26 @@ def test_face_recognition():
         if not cap.isOpened():
             print(f"❌ Could not open USB camera at index {camera_index}")
             return False
+        # Recognition is slower than the camera, so keep only the newest frame in the
+        # driver instead of reading frames that queued up while processing; MJPG keeps
+        # USB bandwidth (and frame rate) up at higher resolutions
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        # Same size as the Pi camera branch (set after the format, which some drivers
+        # reset the size on), rather than whatever mode the webcam starts in
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_height)
     else:
         print("  Using Raspberry Pi Camera")
         try:
             from picamera2 import Picamera2
             camera = Picamera2()
+            # picamera2's RGB888 is stored as B, G, R - already in OpenCV's order
+            # The lores stream is the half-size detection frame, scaled by the ISP; HOG
+            # runs straight on its Y (luma) plane
             camera_config = camera.create_preview_configuration(
-                main={"size": (640, 480)}
+                main={"size": (frame_width, frame_height), "format": "RGB888"},
+                lores={"size": (lores_width, lores_height), "format": "YUV420"}
             )
             camera.configure(camera_config)
             camera.start()
@@ -90,74 +119,130 @@ def test_face_recognition():
     print("   Press 's' to save a test frame")
     
     frame_count = 0
+    scan_count = 0
     faces_detected_count = 0
     faces_recognized_count = 0
+    trackers = []  # (tracker, (location, name, color)) for each face found by the last detection
+    
+    # Capture on a background thread, so the camera keeps delivering while the main
+    # loop runs detection; the loop always takes the newest frame
+    frame_slot = LatestFrameSlot()
+    stop_capture = threading.Event()
+    
+    def capture_frames():
+        try:
+            while not stop_capture.is_set():
+                if camera_type == 'usb_webcam':
+                    ret, frame = cap.read()
+                    if not ret:
+                        print("❌ Failed to capture frame")
+                        return
+                    frame_slot.put((frame, None))
+                else:
+                    # Both streams from the same request, so they show the same moment
+                    request = camera.capture_request()
+                    try:
+                        frame = request.make_array("main")
+                        # Crop both axes: rows below are the chroma planes, columns
+                        # past the width are stride padding
+                        luma = np.ascontiguousarray(request.make_array("lores")[:lores_height, :lores_width])
+                    finally:
+                        request.release()
+                    frame_slot.put((frame, luma))
+        except Exception as e:
+            print(f"❌ Failed to capture frame: {e}")
+    
+    capture_thread = threading.Thread(target=capture_frames, daemon=True)
+    capture_thread.start()
     
     try:
         while True:
-            # Capture frame
-            if camera_type == 'usb_webcam':
-                ret, frame = cap.read()
-                if not ret:
-                    print("❌ Failed to capture frame")
+            # Newest captured frame (the loop ends once capturing has failed)
+            item = frame_slot.get(timeout=0.5)
+            if item is None:
+                if not capture_thread.is_alive():
                     break
-                frame_bgr = frame
-            else:
-                frame = camera.capture_array()
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-            
-            # Resize for faster processing
-            small_frame = cv2.resize(frame_bgr, (0, 0), fx=0.5, fy=0.5)
-            rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-            
-            # Find faces
-            face_locations = face_recognition.face_locations(rgb_frame, model="hog")
-            face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+                continue
+            frame_bgr, luma = item
             
-            # Scale back to original size
-            face_locations = [(top*2, right*2, bottom*2, left*2) for (top, right, bottom, left) in face_locations]
+            # Draw results straight onto the captured frame - every capture is a new
+            # array and detection runs on a half-size copy
+            display_frame = frame_bgr
             
-            # Draw results
-            display_frame = frame_bgr.copy()
-            
-            if face_locations:
-                faces_detected_count += 1
-                for face_encoding, face_location in zip(face_encodings, face_locations):
-                    top, right, bottom, left = face_location
+            if frame_count % DETECT_EVERY_N_FRAMES == 0:
+                scan_count += 1
+                
+                # Find faces at half size - HOG only needs intensity, so it runs on one
+                # channel instead of three (the Pi camera's lores luma plane, if there is one)
+                small_frame = None
+                if luma is not None:
+                    gray_frame = luma
+                else:
+                    small_frame = cv2.resize(frame_bgr, (0, 0), fx=0.5, fy=0.5)
+                    gray_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
+                face_locations = face_recognition.face_locations(gray_frame, model="hog")
+                
+                # Encodings need colour; only resize and convert when there is a face to encode
+                face_encodings = []
+                if face_locations:
+                    if small_frame is None:
+                        small_frame = cv2.resize(frame_bgr, (0, 0), fx=0.5, fy=0.5)
+                    rgb_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+                    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations, num_jitters=1, model="small")
+                
+                # Scale back to original size
+                face_locations = [(top*2, right*2, bottom*2, left*2) for (top, right, bottom, left) in face_locations]
+                
+                faces = []
+                if face_locations:
+                    faces_detected_count += 1
                     
-                    # Compare with known faces
-                    if known_faces:
-                        matches = face_recognition.compare_faces(
-                            known_faces, 
-                            face_encoding,
-                            tolerance=config.get('face_recognition_tolerance', 0.6)
-                        )
-                        face_distance = face_recognition.face_distance(known_faces, face_encoding)
-                        
-                        name = "Unknown"
-                        if len(face_distance) > 0:
-                            best_match_index = face_distance.argmin()
-                            if matches[best_match_index]:
-                                name = known_names[best_match_index]
-                                faces_recognized_count += 1
-                                color = (0, 255, 0)  # Green
-                            else:
-                                color = (0, 0, 255)  # Red
-                        else:
-                            color = (0, 0, 255)  # Red
-                    else:
-                        name = "Unknown"
-                        color = (0, 0, 255)  # Red
+                    # Compare every face with every known face in one matrix multiply
+                    probes = np.asarray(face_encodings, dtype=np.float32)
+                    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+                    similarities = probes @ known_faces_mat.T
+                    best_matches = similarities.argmax(axis=1)
                     
-                    # Draw box
-                    cv2.rectangle(display_frame, (left, top), (right, bottom), color, 2)
-                    cv2.rectangle(display_frame, (left, bottom - 35), (right, bottom), color, cv2.FILLED)
-                    cv2.putText(display_frame, name, (left + 6, bottom - 6),
-                               cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 255), 1)
+                    for face_location, face_similarities, best_match_index in zip(face_locations, similarities, best_matches):
+                        if face_similarities[best_match_index] >= min_similarity:
+                            faces_recognized_count += 1
+                            faces.append((face_location, known_names[best_match_index], (0, 255, 0)))  # Green
+                        else:
+                            faces.append((face_location, "Unknown", (0, 0, 255)))  # Red
+                
+                # Follow the faces until the next detection (without a tracker
+                # implementation the boxes stay where they were detected)
+                trackers = []
+                for face in faces:
+                    (top, right, bottom, left), name, color = face
+                    tracker = create_face_tracker()
+                    if tracker is not None:
+                        tracker.init(frame_bgr, (left, top, right - left, bottom - top))
+                    trackers.append((tracker, face))
+            else:
+                # Between detections, move the boxes with the trackers and keep their names
+                faces = []
+                still_tracked = []
+                for tracker, face in trackers:
+                    if tracker is not None:
+                        ok, (x, y, w, h) = tracker.update(frame_bgr)
+                        if not ok:
+                            continue
+                        face = ((int(y), int(x + w), int(y + h), int(x)),) + face[1:]
+                    faces.append(face)
+                    still_tracked.append((tracker, face))
+                trackers = still_tracked
+            
+            for (top, right, bottom, left), name, color in faces:
+                # Draw box
+                cv2.rectangle(display_frame, (left, top), (right, bottom), color, 2)
+                cv2.rectangle(display_frame, (left, bottom - 35), (right, bottom), color, cv2.FILLED)
+                cv2.putText(display_frame, name, (left + 6, bottom - 6),
+                           cv2.FONT_HERSHEY_DUPLEX, 0.6, (255, 255, 255), 1)
             
             # Add status
-            status = f"Frame: {frame_count} | Faces detected: {len(face_locations)}"
-            if face_locations:
+            status = f"Frame: {frame_count} | Faces detected: {len(faces)}"
+            if faces:
                 status += f" | Detected: {faces_detected_count} | Recognized: {faces_recognized_count}"
             cv2.putText(display_frame, status, (10, 30),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
@@ -186,6 +271,8 @@ def test_face_recognition():
         traceback.print_exc()
     finally:
         # Cleanup
+        stop_capture.set()
+        capture_thread.join(timeout=2.0)
         if camera_type == 'usb_webcam':
             cap.release()
         else:
@@ -197,11 +284,12 @@ def test_face_recognition():
     print("SUMMARY")
     print("=" * 60)
     print(f"Total frames processed: {frame_count}")
+    print(f"Frames scanned for faces: {scan_count}")
     print(f"Frames with faces detected: {faces_detected_count}")
     print(f"Frames with recognized faces: {faces_recognized_count}")
     
-    if frame_count > 0:
-        detection_rate = (faces_detected_count / frame_count) * 100
+    if scan_count > 0:
+        detection_rate = (faces_detected_count / scan_count) * 100
         print(f"Face detection rate: {detection_rate:.1f}%")
     
     if faces_detected_count > 0:
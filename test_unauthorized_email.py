@@ -38,14 +38,12 @@ def test_unauthorized_alert():
     
     try:
         # Capture frame from camera
-        frame_rgb = system.camera.capture_array()
-        if frame_rgb is None:
+        # The security system's camera already delivers frames in OpenCV's BGR order
+        frame = system.camera.capture_array()
+        if frame is None:
             print("   ✗ Failed to capture frame from camera")
             return
         
-        # Convert RGB to BGR for OpenCV
-        frame = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
-        
         print(f"   ✓ Frame captured: {frame.shape}")
         
         # Create a fake face location (you can adjust these coordinates)
@@ -65,6 +63,10 @@ def test_unauthorized_alert():
         
         system.send_unauthorized_alert(frame, face_location, 999, "TEST")
         
+        # Photo is saved and email sent from background workers, wait for them to finish
+        system.alert_executor.shutdown(wait=True)
+        system.email_sender.close(timeout=30)
+        
         print("\n4. Checking results...")
         
         # Check if photo was saved
@@ -95,6 +97,7 @@ def test_unauthorized_alert():
         # Clean up camera
         if system.camera:
             system.camera.stop()
+            system.camera.close()
             print("\n   Camera stopped")
 
 if __name__ == "__main__":
@@ -7,7 +7,7 @@ Voice features for security system
 
 import pyttsx3
 import threading
-import queue
+from collections import deque
 
 
 class VoiceSystem:
@@ -20,8 +20,9 @@ class VoiceSystem:
             self.engine.setProperty('rate', 150)  # Speech rate
             self.engine.setProperty('volume', 0.8)  # Volume (0.0 to 1.0)
             
-            # Queue for voice messages
-            self.message_queue = queue.Queue()
+            # Messages waiting to be spoken; the event wakes the worker, which otherwise sleeps
+            self.messages = deque()
+            self._ready = threading.Event()
             self.is_speaking = False
             
             # Start voice thread
@@ -36,39 +37,43 @@ class VoiceSystem:
     def _voice_worker(self):
         """Worker thread for voice announcements"""
         while True:
-            try:
-                message = self.message_queue.get(timeout=1)
-                if self.engine:
-                    self.is_speaking = True
-                    self.engine.say(message)
-                    self.engine.runAndWait()
+            self._ready.wait()
+            # Clear before taking messages, so one queued meanwhile sets the event again
+            self._ready.clear()
+            while self.messages:
+                message = self.messages.popleft()
+                try:
+                    if self.engine:
+                        self.is_speaking = True
+                        self.engine.say(message)
+                        self.engine.runAndWait()
+                except Exception as e:
+                    print(f"Error in voice worker: {e}")
+                finally:
                     self.is_speaking = False
-                self.message_queue.task_done()
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"Error in voice worker: {e}")
-                self.is_speaking = False
     
     def speak(self, message):
         """Queue a message to be spoken"""
         if self.engine:
-            self.message_queue.put(message)
+            # A message already waiting is not queued again (e.g. the welcome repeated
+            # on every scan while someone stays in view)
+            if message not in self.messages:
+                self.messages.append(message)
+                self._ready.set()
         else:
             print(f"[Voice]: {message}")
     
     def speak_unauthorized(self):
         """Announce unauthorized person detection"""
-        import time
         messages = [
             "Who are you?",
             "What are you doing in my room?",
             "You are not authorized to be here.",
             "Security alert activated."
         ]
-        for msg in messages:
-            self.speak(msg)
-            time.sleep(0.5)
+        # One utterance: a single runAndWait instead of restarting the engine's loop per
+        # sentence; the punctuation keeps the pauses between them
+        self.speak(" ".join(messages))
     
     def speak_authorized(self, name):
         """Announce authorized person"""